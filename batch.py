@@ -0,0 +1,339 @@
+'''
+batch jobs over many puzzles, run in a process pool
+
+    python batch.py generate -n 1000 --size 15x15 --difficulty rules --seed 1 -o puzzles.txt
+    python batch.py solve puzzles.txt --timeout 10 -o report.tsv
+    zcat dump.txt.gz | python batch.py solve - --no-rules
+    python batch.py thumbs puzzles.txt thumbs/ --zoom 16
+'''
+from __future__ import annotations
+import typing as t
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import dataclasses
+import heapq
+import itertools
+import os
+import pathlib
+import random
+import sys
+import time
+
+import game
+import generator
+import reader
+import rules
+import sat
+import solver
+from rules import Contradiction
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class GenJob:
+    index: int
+    seed: int
+    w: int
+    h: int
+    difficulty: generator.Difficulty
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class SolveJob:
+    index: int
+    # a malformed record of the corpus is reported as an error in its place
+    puzzle: game.Board | reader.ParseError
+    # seconds, checked at every search node and at every conflict of SAT
+    timeout: float | None
+    # also look for a second solution
+    unique: bool
+
+
+type SolveStatus = str
+SOLVE_OK: t.Final[SolveStatus] = 'solved'
+SOLVE_NONE: t.Final[SolveStatus] = 'no-solution'
+SOLVE_MULTIPLE: t.Final[SolveStatus] = 'multiple'
+SOLVE_TIMEOUT: t.Final[SolveStatus] = 'timeout'
+SOLVE_ERROR: t.Final[SolveStatus] = 'error'
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class SolveResult:
+    index: int
+    status: SolveStatus
+    seconds: float
+    nodes: int
+    error: str = ''
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class GenResult:
+    job: GenJob
+    puzzle: game.Board
+    # difficulty the puzzle was rated at, can be easier than the requested one
+    rated: generator.Difficulty | None
+    seconds: float
+
+
+def job_seed(seed: int, index: int, /) -> int:
+    '''seed of a job, depends only on the batch seed and the job index, never on scheduling'''
+    return seed << 32 | index
+
+
+def format_puzzle(board: game.Board, /) -> str:
+    '''board in the layout of rules.sli, reader.parse_art reads it back'''
+    return ''.join(f' {line} \n' for line in board.rows())
+
+
+def _generate(job: GenJob, /) -> GenResult:
+    start = time.perf_counter()
+    puzzle = generator.generate(job.w, job.h, job.difficulty, rng=random.Random(job.seed))
+    rated = generator.rate(puzzle)
+    return GenResult(job, puzzle, rated, time.perf_counter() - start)
+
+
+def generate(
+    jobs: t.Sequence[GenJob],
+    out: t.TextIO,
+    /,
+    workers: int | None = None,
+) -> t.Iterator[GenResult]:
+    '''
+    runs the jobs in a pool and writes every puzzle to out as soon as it and all jobs before it are done;
+    results come in job order, so the output depends only on the jobs and not on the number of workers
+    '''
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        for res in pool.map(_generate, jobs):
+            job = res.job
+            rated = '?' if res.rated is None else generator.DIFFICULTY_NAMES[res.rated]
+            out.write(
+                f'# job={job.index} seed={job.seed} size={job.w}x{job.h}'
+                f' target={generator.DIFFICULTY_NAMES[job.difficulty]} rated={rated}\n'
+            )
+            out.write(format_puzzle(res.puzzle))
+            out.write('\n')
+            out.flush()
+            yield res
+
+
+# search decisions before a puzzle is handed over to SAT; puzzles that need search usually take a few
+SAT_AFTER_NODES: t.Final = 100
+
+# rule set of a worker process, compiled once in the parent and handed over by _init_solve
+_ruleset: rules.RuleSet | None = None
+
+
+def _init_solve(ruleset: rules.RuleSet | None, /) -> None:
+    global _ruleset
+    _ruleset = ruleset
+
+
+def _solve_sat(puzzle: game.Board, unique: bool, deadline: float | None, /) -> int:
+    '''number of solutions found by SAT, up to 2 if uniqueness is asked for'''
+    first = sat.solve(puzzle, deadline=deadline)
+    if first is None:
+        return 0
+    if not unique:
+        return 1
+    return 1 if sat.solve(puzzle, other_than=first, deadline=deadline) is None else 2
+
+
+def _solve(job: SolveJob, /) -> SolveResult:
+    start = time.perf_counter()
+    s = None
+    status, error = SOLVE_ERROR, ''
+    try:
+        puzzle = job.puzzle
+        if isinstance(puzzle, reader.ParseError):
+            raise puzzle
+        s = solver.Solver(puzzle, _ruleset)
+        deadline = None if job.timeout is None else time.monotonic() + job.timeout
+        limit = 2 if job.unique else 1
+        try:
+            found = sum(1 for _ in itertools.islice(s.solutions(SAT_AFTER_NODES, deadline=deadline), limit))
+        except solver.SearchLimit:
+            if deadline is not None and time.monotonic() > deadline:
+                raise
+            found = _solve_sat(puzzle, job.unique, deadline)
+        status = (SOLVE_NONE, SOLVE_OK, SOLVE_MULTIPLE)[found]
+    except Contradiction:
+        status = SOLVE_NONE
+    except solver.SearchLimit:
+        status = SOLVE_TIMEOUT
+    except Exception as e:
+        error = f'{type(e).__name__}: {e}'
+    return SolveResult(job.index, status, time.perf_counter() - start, s.nodes if s is not None else 0, error)
+
+
+def solve(
+    jobs: t.Iterable[SolveJob],
+    ruleset: rules.RuleSet | None,
+    /,
+    workers: int | None = None,
+) -> t.Iterator[SolveResult]:
+    '''
+    solves the puzzles in a pool, results come in job order;
+    the rule set is sent to every worker once when it starts, not parsed again there;
+    jobs are taken from the iterable only a few at a time per worker, so it can be a stream of any length
+    '''
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer=_init_solve, initargs=(ruleset,)) as pool:
+        yield from _imap(pool, _solve, jobs, workers)
+
+
+def _imap[J, R](
+    pool: concurrent.futures.Executor,
+    fn: t.Callable[[J], R],
+    jobs: t.Iterable[J],
+    workers: int | None,
+    /,
+) -> t.Iterator[R]:
+    '''pool.map that takes only a few jobs at a time per worker from the iterable'''
+    window = 4 * (workers or os.cpu_count() or 1)
+    pending: collections.deque[concurrent.futures.Future[R]] = collections.deque()
+    for job in jobs:
+        pending.append(pool.submit(fn, job))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ThumbJob:
+    board: game.Board
+    path: pathlib.Path
+    zoom: float
+
+
+def _thumb(job: ThumbJob, /) -> pathlib.Path:
+    # pygame is imported only by the workers that draw
+    import render
+
+    render.save_png(job.board, job.path, job.zoom)
+    return job.path
+
+
+def _size(s: str, /) -> tuple[int, int]:
+    w, _, h = s.partition('x')
+    return int(w), int(h or w)
+
+
+def _cmd_generate(args: argparse.Namespace, /) -> None:
+    difficulty = generator.DIFFICULTY_NAMES.index(args.difficulty)
+    w, h = args.size
+    jobs = [GenJob(i, job_seed(args.seed, i), w, h, difficulty) for i in range(args.count)]
+
+    hist: collections.Counter[str] = collections.Counter()
+    busy = 0.0
+    start = time.perf_counter()
+    with contextlib.nullcontext(sys.stdout) if args.output == '-' else open(args.output, 'w') as out:
+        for res in generate(jobs, out, args.workers):
+            hist['?' if res.rated is None else generator.DIFFICULTY_NAMES[res.rated]] += 1
+            busy += res.seconds
+    elapsed = time.perf_counter() - start
+
+    log = sys.stderr
+    print(f'{len(jobs)} puzzles {w}x{h} in {elapsed:.2f}s: {len(jobs) / elapsed:.2f} puzzles/s', file=log)
+    print(f'{busy / max(1, len(jobs)):.3f}s per puzzle in a worker', file=log)
+    for name in (*generator.DIFFICULTY_NAMES, '?'):
+        if hist[name]:
+            print(f'{name:>8}: {hist[name]}', file=log)
+
+
+def _cmd_solve(args: argparse.Namespace, /) -> None:
+    ruleset = None if args.no_rules else rules.load_rules(args.rules)
+
+    hist: collections.Counter[SolveStatus] = collections.Counter()
+    busy = 0.0
+    # the slowest puzzles seen so far: (seconds, index, result)
+    slow: list[tuple[float, int, SolveResult]] = []
+    start = time.perf_counter()
+    with (
+        contextlib.nullcontext(sys.stdin) if args.corpus == '-' else open(args.corpus) as f,
+        contextlib.nullcontext(sys.stdout) if args.output == '-' else open(args.output, 'w') as out,
+    ):
+        jobs = (SolveJob(i, b, args.timeout, args.unique) for i, b in enumerate(reader.read_records(f)))
+        out.write('index\tstatus\tseconds\tnodes\terror\n')
+        for res in solve(jobs, ruleset, args.workers):
+            out.write(f'{res.index}\t{res.status}\t{res.seconds:.4f}\t{res.nodes}\t{res.error}\n')
+            out.flush()
+            hist[res.status] += 1
+            busy += res.seconds
+            heapq.heappush(slow, (res.seconds, res.index, res))
+            if len(slow) > 5:
+                heapq.heappop(slow)
+    elapsed = time.perf_counter() - start
+
+    log = sys.stderr
+    print(f'{hist.total()} puzzles in {elapsed:.2f}s, {busy:.2f}s in workers', file=log)
+    for status in (SOLVE_OK, SOLVE_MULTIPLE, SOLVE_NONE, SOLVE_TIMEOUT, SOLVE_ERROR):
+        if hist[status]:
+            print(f'{status:>12}: {hist[status]}', file=log)
+    for _, _, res in sorted(slow, reverse=True):
+        print(f'slow: #{res.index} {res.status} {res.seconds:.3f}s {res.nodes} nodes', file=log)
+
+
+def _cmd_thumbs(args: argparse.Namespace, /) -> None:
+    out = pathlib.Path(args.output)
+    out.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    n = 0
+    errors = 0
+
+    def jobs(f: t.TextIO, /) -> t.Iterator[ThumbJob]:
+        # malformed records are skipped, images keep the index of their record
+        nonlocal errors
+        for i, rec in enumerate(reader.read_records(f)):
+            if isinstance(rec, reader.ParseError):
+                print(f'#{i}: {rec}', file=sys.stderr)
+                errors += 1
+            else:
+                yield ThumbJob(rec, out / f'{i:06}.png', args.zoom)
+
+    with contextlib.nullcontext(sys.stdin) if args.corpus == '-' else open(args.corpus) as f:
+        with concurrent.futures.ProcessPoolExecutor(args.workers) as pool:
+            for _ in _imap(pool, _thumb, jobs(f), args.workers):
+                n += 1
+    elapsed = time.perf_counter() - start
+    print(f'{n} images in {elapsed:.2f}s', file=sys.stderr)
+    if errors:
+        print(f'{errors} malformed puzzles skipped', file=sys.stderr)
+
+
+def main(argv: t.Sequence[str] | None = None, /) -> None:
+    parser = argparse.ArgumentParser(description='batch jobs over many puzzles')
+    sub = parser.add_subparsers(required=True)
+
+    p = sub.add_parser('generate', help='generate puzzles')
+    p.add_argument('-n', '--count', type=int, default=100)
+    p.add_argument('--size', type=_size, default=(10, 10), help='WxH or N')
+    p.add_argument('--difficulty', choices=generator.DIFFICULTY_NAMES, default='rules')
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('-j', '--workers', type=int, default=None, help='default: number of CPUs')
+    p.add_argument('-o', '--output', default='-')
+    p.set_defaults(func=_cmd_generate)
+
+    p = sub.add_parser('solve', help='solve every puzzle of a text file, see reader.py for the formats')
+    p.add_argument('corpus', help='- for stdin')
+    p.add_argument('--timeout', type=float, default=None, help='seconds per puzzle, also for SAT')
+    p.add_argument('--unique', action='store_true', help='also look for a second solution')
+    p.add_argument('--rules', default=rules.RULES_PATH)
+    p.add_argument('--no-rules', action='store_true')
+    p.add_argument('-j', '--workers', type=int, default=None, help='default: number of CPUs')
+    p.add_argument('-o', '--output', default='-')
+    p.set_defaults(func=_cmd_solve)
+
+    p = sub.add_parser('thumbs', help='draw every puzzle of a text file to a PNG image')
+    p.add_argument('corpus', help='- for stdin')
+    p.add_argument('output', help='directory for the images, named by puzzle index')
+    p.add_argument('--zoom', type=float, default=16, help='pixels per cell')
+    p.add_argument('-j', '--workers', type=int, default=None, help='default: number of CPUs')
+    p.set_defaults(func=_cmd_thumbs)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+'''
+benchmarks on fixed-seed workloads at several board sizes
+
+    python bench.py -o bench.json                    # run and save the results
+    python bench.py --baseline bench.json            # run and compare with saved results
+    python bench.py --sizes 10 50 --only str parse
+    python bench.py --sizes 10 15 --only solve.search sat.search
+
+every result is the best time of one call out of a few runs, in seconds
+'''
+from __future__ import annotations
+import typing as t
+import argparse
+import array
+import dataclasses
+import functools
+import json
+import os
+import platform
+import random
+import sys
+import time
+import timeit
+
+import game
+import generator
+import reader
+import rules
+import sat
+import solver
+
+SIZES: t.Final = (10, 50, 200, 1000)
+SEED: t.Final = 1
+# puzzles that need search are generated, which is slow on big boards, so there are only a few small ones
+SEARCH_SEEDS: t.Final = range(4)
+SEARCH_MAX_SIZE: t.Final = 20
+_RUNS: t.Final = 3
+# a single call slower than this is not repeated
+_SLOW_CALL: t.Final = 2.0
+
+
+def comb_loop(w: int, h: int, rng: random.Random, /) -> game.Board:
+    '''
+    board with the edges of a loop around a comb: a band along the top row
+    and teeth of random length hanging from it in every other column;
+    much cheaper than generator.random_loop on big boards
+    '''
+    depth = [1] * w
+    for x in range(0, w, 2):
+        depth[x] = rng.randint(1, h)
+
+    def inside(x: int, y: int, /) -> bool:
+        return 0 <= x < w and 0 <= y < depth[x]
+
+    b = game.Board(w, h)
+    for y in range(h + 1):
+        for x in range(w):
+            b._set_edge_h(x, y, int(inside(x, y - 1) != inside(x, y)))
+    for y in range(h):
+        for x in range(w + 1):
+            b._set_edge_v(x, y, int(inside(x - 1, y) != inside(x, y)))
+    return b
+
+
+@functools.cache
+def workload(n: int, /) -> tuple[game.Board, game.Board]:
+    '''(puzzle with every clue of a loop, the loop) of size n x n'''
+    rng = random.Random(SEED * 1_000_003 + n)
+    solution = generator.random_loop(n, n, rng) if n <= 200 else comb_loop(n, n, rng)
+    puzzle = game.Board(n, n)
+    puzzle.data_num = array.array('b', solution.counts().cell_lines)
+    return puzzle, solution
+
+
+@functools.cache
+def search_workload(n: int, /) -> list[game.Board]:
+    '''generated DIFFICULTY_SEARCH puzzles of size n x n, one for each of SEARCH_SEEDS'''
+    return [
+        generator.generate(n, n, generator.DIFFICULTY_SEARCH, rng=random.Random(SEED * 1_000_003 + n + (seed << 32)))
+        for seed in SEARCH_SEEDS
+    ]
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Bench:
+    name: str
+    # size -> function to time, None if the benchmark does not run at that size
+    setup: t.Callable[[int], t.Callable[[], object] | None]
+    # number of elementary operations in a call, for throughput
+    ops: t.Callable[[int], int] = lambda n: 1
+
+
+def _board_get(n: int, /) -> t.Callable[[], object]:
+    b = workload(n)[1]
+    get = b._get_edge_h
+    cells = [(x, y) for y in range(n + 1) for x in range(n)]
+    return lambda: [get(x, y) for x, y in cells]
+
+
+def _board_set(n: int, /) -> t.Callable[[], object]:
+    b = workload(n)[1]
+    set_ = b._set_edge_h
+    cells = [(x, y, 1 - b._get_edge_h(x, y)) for y in range(n + 1) for x in range(n)]
+
+    def run() -> None:
+        # every call flips the edges and the next one flips them back
+        for i, (x, y, v) in enumerate(cells):
+            set_(x, y, v)
+            cells[i] = (x, y, 1 - v)
+
+    return run
+
+
+def _parse(n: int, /) -> t.Callable[[], object]:
+    lines = [f' {line} ' for line in workload(n)[0].rows()]
+    return lambda: reader.parse_art(lines)
+
+
+def _str(n: int, /) -> t.Callable[[], object]:
+    b = workload(n)[1]
+    return lambda: str(b)
+
+
+def _rules_apply(n: int, /) -> t.Callable[[], object]:
+    puzzle = workload(n)[0]
+    ruleset = rules.load_rules()
+    return lambda: ruleset.apply(puzzle.copy())
+
+
+def _solve(n: int, /) -> t.Callable[[], object] | None:
+    # every clue is given, so the rules solve it without a decision
+    if n > 200:
+        return None
+    puzzle = workload(n)[0]
+    ruleset = rules.load_rules()
+    return lambda: next(solver.Solver(puzzle, ruleset).solutions())
+
+
+def _solve_search(n: int, /) -> t.Callable[[], object] | None:
+    if n > SEARCH_MAX_SIZE:
+        return None
+    puzzles = search_workload(n)
+    ruleset = rules.load_rules()
+    return lambda: [next(solver.Solver(p, ruleset).solutions()) for p in puzzles]
+
+
+def _sat_search(n: int, /) -> t.Callable[[], object] | None:
+    if n > SEARCH_MAX_SIZE:
+        return None
+    puzzles = search_workload(n)
+    return lambda: [sat.solve(p) for p in puzzles]
+
+
+def _draw(n: int, /) -> t.Callable[[], object]:
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import main
+
+    puzzle, solution = workload(n)
+    board = solution.copy()
+    board.data_num = puzzle.data_num[:]
+    app = main.App(board)
+    return app.draw_board
+
+
+BENCHES: t.Final = (
+    Bench('board.get', _board_get, lambda n: n * (n + 1)),
+    Bench('board.set', _board_set, lambda n: n * (n + 1)),
+    Bench('parse', _parse),
+    Bench('str', _str),
+    Bench('rules.apply', _rules_apply),
+    Bench('solve', _solve),
+    Bench('solve.search', _solve_search, lambda n: len(SEARCH_SEEDS)),
+    Bench('sat.search', _sat_search, lambda n: len(SEARCH_SEEDS)),
+    Bench('draw', _draw),
+)
+
+
+def measure(fn: t.Callable[[], object], /) -> float:
+    '''best time of one call'''
+    timer = timeit.Timer(fn)
+    # enough calls for a run to take 0.2 s
+    number, total = timer.autorange()
+    if total / number >= _SLOW_CALL:
+        return total / number
+    return min(timer.repeat(_RUNS, number)) / number
+
+
+type Results = dict[str, dict[str, dict[str, float]]]
+
+
+def run(sizes: t.Iterable[int], only: t.Collection[str] = (), /) -> Results:
+    '''name -> size -> {'seconds': best time of a call, 'ops_per_second': throughput}'''
+    res: Results = {}
+    for bench in BENCHES:
+        if only and bench.name not in only:
+            continue
+        for n in sizes:
+            fn = bench.setup(n)
+            if fn is None:
+                continue
+            sec = measure(fn)
+            res.setdefault(bench.name, {})[str(n)] = {'seconds': sec, 'ops_per_second': bench.ops(n) / sec}
+            print(f'{bench.name:>12} {n:>5}: {sec * 1e3:10.3f} ms', file=sys.stderr)
+    return res
+
+
+def compare(res: Results, base: Results, /) -> float:
+    '''prints new / baseline time of every result found in both, returns the worst ratio'''
+    worst = 0.0
+    for name, by_size in res.items():
+        for size, r in by_size.items():
+            b = base.get(name, {}).get(size)
+            if b is None:
+                continue
+            ratio = r['seconds'] / b['seconds']
+            worst = max(worst, ratio)
+            print(f'{name:>12} {size:>5}: {b["seconds"] * 1e3:10.3f} -> {r["seconds"] * 1e3:10.3f} ms  x{ratio:.2f}')
+    return worst
+
+
+def main(argv: t.Sequence[str] | None = None, /) -> None:
+    parser = argparse.ArgumentParser(description='benchmarks on fixed-seed workloads')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--only', nargs='+', default=(), choices=[b.name for b in BENCHES])
+    parser.add_argument('-o', '--output', help='file to save the results to, as JSON')
+    parser.add_argument('--baseline', help='results saved earlier to compare with')
+    parser.add_argument('--max-slowdown', type=float, help='exit with 1 if a result is this many times slower than the baseline')
+    args = parser.parse_args(argv)
+
+    started = time.time()
+    res = run(args.sizes, args.only)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(
+                {
+                    'started': started,
+                    'python': platform.python_version(),
+                    'machine': platform.machine(),
+                    'results': res,
+                },
+                f,
+                indent=1,
+            )
+    if args.baseline:
+        with open(args.baseline) as f:
+            worst = compare(res, json.load(f)['results'])
+        if args.max_slowdown is not None and worst > args.max_slowdown:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
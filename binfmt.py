@@ -0,0 +1,186 @@
+'''
+packed binary boards: 2 bits per edge and per clue
+
+a board record is
+    header: width and height as u16, flags as u8 (little-endian)
+    clue mask: 1 bit per cell, set where the cell has a clue
+    clues: 2 bits per cell, 0 where there is no clue
+    edges (only with FLAG_EDGES): 2 bits per edge, h edges then v edges; 0 unknown, 1 no line, 2 line
+every part is padded to whole bytes, elements are in the order of the Board arrays, low bits first
+
+a corpus is a header, the records one after another and an index of their offsets at the end,
+it is read through mmap and records are decoded only when asked for
+'''
+from __future__ import annotations
+import typing as t
+import array
+import functools
+import mmap
+import os
+import struct
+import sys
+
+import game
+
+FLAG_EDGES: t.Final = 1
+
+_RECORD_HEADER: t.Final = struct.Struct('<HHB')
+# magic, version, number of boards, offset of the index
+_CORPUS_HEADER: t.Final = struct.Struct('<4sIQQ')
+_CORPUS_MAGIC: t.Final = b'SLKC'
+_CORPUS_VERSION: t.Final = 1
+_OFFSET: t.Final = struct.Struct('<Q')
+
+# byte of a Board array (signed, so EDGE_UNK is 0xFF) <-> 2 bit code
+_EDGE_CODE: t.Final = bytes((i + 1) & 3 for i in range(256))
+_EDGE_VALUE: t.Final = bytes([game.EDGE_UNK & 0xFF, game.EDGE_0, game.EDGE_1, game.EDGE_UNK & 0xFF]) + bytes(252)
+_NUM_CODE: t.Final = bytes(0 if i == game.NUM_UNK & 0xFF else i & 3 for i in range(256))
+_NUM_MASK: t.Final = bytes(int(i != game.NUM_UNK & 0xFF) for i in range(256))
+# mask bit << 2 | code -> byte of a Board array
+_NUM_VALUE: t.Final = bytes(i & 3 if i & 4 else game.NUM_UNK & 0xFF for i in range(256))
+
+
+@functools.cache
+def _lanes(lane: int, value: int, size: int, /) -> int:
+    '''value repeated in every lane of lane bits of a big int of size bytes'''
+    return int.from_bytes(value.to_bytes(lane // 8, 'little') * (size * 8 // lane), 'little')
+
+
+def _pack(codes: bytes, bits: int, /) -> bytes:
+    '''
+    codes of bits bits, one per byte -> 8 // bits codes per byte;
+    done on one big int, every step merges neighbouring lanes into one twice as wide
+    '''
+    per = 8 // bits
+    size = -(-len(codes) // per) * per
+    x = int.from_bytes(codes, 'little')
+    lane, width = 8, bits
+    while width < 8:
+        x = (x | x >> (lane - width)) & _lanes(2 * lane, (1 << 2 * width) - 1, size)
+        lane, width = 2 * lane, 2 * width
+    return x.to_bytes(size, 'little')[::per]
+
+
+def _unpack(data: bytes, bits: int, count: int, /) -> bytes:
+    '''reverse of _pack: count codes, one per byte'''
+    per = 8 // bits
+    size = -(-count // per) * per
+    spread = bytearray(size)
+    spread[::per] = data[: size // per]
+    x = int.from_bytes(spread, 'little')
+    lane, width = 8 * per, 8
+    while width > bits:
+        lane, width = lane // 2, width // 2
+        x = (x | x << (lane - width)) & _lanes(2 * lane, ((1 << width) - 1) * (1 | 1 << lane), size)
+    return x.to_bytes(size, 'little')[:count]
+
+
+def _sizes(x: int, y: int, flags: int, /) -> tuple[int, int, int]:
+    '''bytes of the clue mask, the clues and the edges of a record'''
+    ne = x * (y + 1) + (x + 1) * y if flags & FLAG_EDGES else 0
+    return -(-x * y // 8), -(-x * y // 4), -(-ne // 4)
+
+
+def encode(board: game.Board, /, *, edges: bool | None = None) -> bytes:
+    '''
+    record of a board; edges are stored if any of them is known, unless edges says otherwise
+    '''
+    edge_bytes = board.data_h.tobytes() + board.data_v.tobytes()
+    if edges is None:
+        edges = edge_bytes.count(game.EDGE_UNK & 0xFF) != len(edge_bytes)
+    nums = board.data_num.tobytes()
+    parts = [
+        _RECORD_HEADER.pack(board.x, board.y, FLAG_EDGES if edges else 0),
+        _pack(nums.translate(_NUM_MASK), 1),
+        _pack(nums.translate(_NUM_CODE), 2),
+    ]
+    if edges:
+        parts.append(_pack(edge_bytes.translate(_EDGE_CODE), 2))
+    return b''.join(parts)
+
+
+def decode(buf: bytes | mmap.mmap, offset: int = 0, /) -> game.Board:
+    '''board of the record at offset'''
+    x, y, flags = _RECORD_HEADER.unpack_from(buf, offset)
+    n_mask, n_nums, n_edges = _sizes(x, y, flags)
+    pos = offset + _RECORD_HEADER.size
+    mask = int.from_bytes(_unpack(buf[pos : pos + n_mask], 1, x * y), 'little')
+    pos += n_mask
+    codes = int.from_bytes(_unpack(buf[pos : pos + n_nums], 2, x * y), 'little')
+    pos += n_nums
+
+    b = game.Board(x, y)
+    b.data_num = array.array('b', (mask << 2 | codes).to_bytes(x * y, 'little').translate(_NUM_VALUE))
+    if flags & FLAG_EDGES:
+        nh = x * (y + 1)
+        edges = _unpack(buf[pos : pos + n_edges], 2, nh + (x + 1) * y).translate(_EDGE_VALUE)
+        b.data_h = array.array('b', edges[:nh])
+        b.data_v = array.array('b', edges[nh:])
+    return b
+
+
+def write_corpus(path: str | os.PathLike[str], boards: t.Iterable[game.Board], /) -> int:
+    '''writes the boards as they come and returns their number'''
+    offsets = array.array('Q')
+    with open(path, 'wb') as f:
+        f.write(_CORPUS_HEADER.pack(_CORPUS_MAGIC, _CORPUS_VERSION, 0, 0))
+        pos = _CORPUS_HEADER.size
+        for b in boards:
+            offsets.append(pos)
+            pos += f.write(encode(b))
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+        f.write(offsets.tobytes())
+        f.seek(0)
+        f.write(_CORPUS_HEADER.pack(_CORPUS_MAGIC, _CORPUS_VERSION, len(offsets), pos))
+    return len(offsets)
+
+
+class Corpus:
+    '''
+    boards of a corpus file by index; opening reads only the header,
+    a board is read and decoded when it is accessed
+    '''
+
+    _file: t.BinaryIO
+    _mm: mmap.mmap
+    _count: int
+    _index: int
+
+    def __init__(self, path: str | os.PathLike[str], /) -> None:
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, self._count, self._index = _CORPUS_HEADER.unpack_from(self._mm)
+        except (ValueError, struct.error):
+            self.close()
+            raise ValueError(f'{path}: not a corpus file') from None
+        if magic != _CORPUS_MAGIC or version != _CORPUS_VERSION:
+            self.close()
+            raise ValueError(f'{path}: not a corpus file of version {_CORPUS_VERSION}')
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int, /) -> game.Board:
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        (offset,) = _OFFSET.unpack_from(self._mm, self._index + i * _OFFSET.size)
+        return decode(self._mm, offset)
+
+    def __iter__(self) -> t.Iterator[game.Board]:
+        for i in range(self._count):
+            yield self[i]
+
+    def close(self) -> None:
+        if hasattr(self, '_mm'):
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self) -> t.Self:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
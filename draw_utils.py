@@ -11,6 +11,14 @@ DEFAULT_FONT: t.Final = 'fira code'
 Color = tuple[int, int, int]
 
 
+def pixel(p: Point, /) -> tuple[int, int]:
+    '''
+    nearest pixel, halves are rounded up: unlike round() and truncation
+    the result moves by exactly n when p moves by a whole number n, so images can be drawn in parts
+    '''
+    return (p + Point(0.5, 0.5)).floor()
+
+
 def draw_surface_centered(
     sur1: pg.surface.Surface,
     sur2: pg.surface.Surface,
@@ -20,7 +28,7 @@ def draw_surface_centered(
 ) -> None:
     size = Point.from_tuple(sur2.get_size())
     dest = xy1 + (xy2 - xy1 - size) / 2
-    sur1.blit(sur2, dest.round())
+    sur1.blit(sur2, pixel(dest))
 
 
 def draw_dashed_line(
@@ -39,8 +47,8 @@ def draw_dashed_line(
         pg.draw.line(
             surf,
             color,
-            ps.round(),
-            pe.round(),
+            pixel(ps),
+            pixel(pe),
             width=round(width),
         )
     # TODO: fix it :)
@@ -78,8 +86,8 @@ def draw_line(
     pg.draw.line(
         surf,
         color,
-        p1.to_tuple(),
-        p2.to_tuple(),
+        pixel(p1),
+        pixel(p2),
         width=width,
     )
 
@@ -1,9 +1,8 @@
 from __future__ import annotations
 import typing as t
+import array
 import dataclasses
 
-from stringbuilder import StringBuilder
-
 # -1 - no info
 #  0 - no edge present
 #  1 - edge present
@@ -43,7 +42,7 @@ class Vertex:
     _board: Board
 
     @property
-    def value(self) -> Vertex:
+    def value(self) -> _Vertex:
         return self._board._get_vtx(self.x, self.y)
 
     @property
@@ -132,17 +131,104 @@ class _Edges:
         return Edge(x, y, self._board)
 
 
+# edge state byte (as stored in the arrays) -> 1 if it is the state we count, else 0
+_IS_LINE: t.Final = bytes(int(i == EDGE_1 & 0xFF) for i in range(256))
+_IS_UNK: t.Final = bytes(int(i == EDGE_UNK & 0xFF) for i in range(256))
+
+
+def _glyphs(glyphs: dict[int, str], /) -> bytes:
+    '''translation table: state byte (as stored in the arrays) -> glyph of str(board), '?' for invalid states'''
+    table = bytearray(b'?' * 256)
+    for v, c in glyphs.items():
+        table[v & 0xFF] = ord(c)
+    return bytes(table)
+
+
+_GLYPH_H: t.Final = _glyphs({EDGE_UNK: ' ', EDGE_0: 'x', EDGE_1: '-'})
+_GLYPH_V: t.Final = _glyphs({EDGE_UNK: ' ', EDGE_0: 'x', EDGE_1: '|'})
+_GLYPH_NUM: t.Final = _glyphs({NUM_UNK: ' ', 0: '0', 1: '1', 2: '2', 3: '3'})
+
+
+def _lane_sum(*parts: bytes | bytearray) -> bytes:
+    '''
+    bytewise sum of equally long byte strings, done as one addition of big ints,
+    so every sum has to fit into a byte
+    '''
+    total = 0
+    for p in parts:
+        total += int.from_bytes(p, 'little')
+    return total.to_bytes(len(parts[0]), 'little')
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Counts:
+    '''
+    number of lines and unknown edges around every cell and at every vertex
+    cell_* are y rows of x, vtx_* are (y + 1) rows of (x + 1), row-major
+    '''
+
+    x: int
+    y: int
+    cell_lines: bytes
+    cell_unk: bytes
+    vtx_lines: bytes
+    vtx_unk: bytes
+
+
+@dataclasses.dataclass(eq=False)
+class Changes:
+    '''
+    positions modified since the last drain,
+    filled in by the board this object is subscribed to
+    '''
+
+    cells: set[tuple[int, int]] = dataclasses.field(default_factory=set)
+    vertices: set[tuple[int, int]] = dataclasses.field(default_factory=set)
+    edges_h: set[tuple[int, int]] = dataclasses.field(default_factory=set)
+    edges_v: set[tuple[int, int]] = dataclasses.field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(self.cells or self.vertices or self.edges_h or self.edges_v)
+
+    def drain(self) -> Changes:
+        '''returns everything collected so far and starts collecting anew'''
+        res = Changes(self.cells, self.vertices, self.edges_h, self.edges_v)
+        self.cells = set()
+        self.vertices = set()
+        self.edges_h = set()
+        self.edges_v = set()
+        return res
+
+
 class Board:
     x: int
     y: int
-    data: list[list[t.Any]]
+    # one signed byte per element, row-major:
+    # data_h is (y + 1) rows of x, data_v is y rows of (x + 1), data_num is y rows of x
+    data_h: array.array[int]
+    data_v: array.array[int]
+    data_num: array.array[int]
+    # vertices are almost never set and may hold anything, so they are sparse
+    data_vtx: dict[tuple[int, int], _Vertex]
+    _subscribers: list[Changes]
 
     def __init__(self, x: int, y: int, /) -> None:
         self.x = x
         self.y = y
-        empty_row_v = [VERTEX_UNK, EDGE_UNK] * x + [VERTEX_UNK]
-        empty_row_m = [EDGE_UNK, NUM_UNK] * x + [EDGE_UNK]
-        self.data = [empty_row_v[::] if i % 2 == 0 else empty_row_m[::] for i in range(2 * y + 1)]
+        self.data_h = array.array('b', [EDGE_UNK]) * (x * (y + 1))
+        self.data_v = array.array('b', [EDGE_UNK]) * ((x + 1) * y)
+        self.data_num = array.array('b', [NUM_UNK]) * (x * y)
+        self.data_vtx = {}
+        self._subscribers = []
+
+    def subscribe(self) -> Changes:
+        '''starts recording modifications, drain the result to get them'''
+        ch = Changes()
+        self._subscribers.append(ch)
+        return ch
+
+    def unsubscribe(self, ch: Changes, /) -> None:
+        self._subscribers.remove(ch)
 
     @property
     def vertices(self) -> _Vertices:
@@ -157,180 +243,143 @@ class Board:
         return _Edges(self)
 
     def _get_num(self, x: int, y: int) -> _Num:
-        if x not in range(0, self.x): return NUM_UNK
-        if y not in range(0, self.y): return NUM_UNK
-        return self.data[2 * y + 1][2 * x + 1]
+        if 0 <= x < self.x and 0 <= y < self.y:
+            return self.data_num[y * self.x + x]
+        return NUM_UNK
 
     def _set_num(self, x: int, y: int, val: _Num) -> None:
-        if x not in range(0, self.x): raise Exception('TODO: think about it')
-        if y not in range(0, self.y): raise Exception('TODO: think about it')
-        self.data[2 * y + 1][2 * x + 1] = val
-
-    def _get_vtx(self, x: int, y: int) -> Vertex: # TODO: fix later
-        if x not in range(0, self.x + 1): return VERTEX_UNK
-        if y not in range(0, self.y + 1): return VERTEX_UNK
-        return self.data[2 * y][2 * x]
-
-    def _set_vtx(self, x: int, y: int, val: Vertex) -> None:
-        if x not in range(0, self.x + 1): raise Exception('TODO: think about it')
-        if y not in range(0, self.y + 1): raise Exception('TODO: think about it')
-        self.data[2 * y][2 * x] = val
+        if not (0 <= x < self.x and 0 <= y < self.y): raise Exception('TODO: think about it')
+        i = y * self.x + x
+        if self.data_num[i] != val:
+            self.data_num[i] = val
+            for ch in self._subscribers:
+                ch.cells.add((x, y))
+
+    def _get_vtx(self, x: int, y: int) -> _Vertex: # TODO: fix later
+        return self.data_vtx.get((x, y), VERTEX_UNK)
+
+    def _set_vtx(self, x: int, y: int, val: _Vertex) -> None:
+        if not (0 <= x <= self.x and 0 <= y <= self.y): raise Exception('TODO: think about it')
+        if self.data_vtx.get((x, y), VERTEX_UNK) == val:
+            return
+        if val == VERTEX_UNK:
+            del self.data_vtx[x, y]
+        else:
+            self.data_vtx[x, y] = val
+        for ch in self._subscribers:
+            ch.vertices.add((x, y))
 
     def _get_edge_h(self, x: int, y: int) -> _Edge:
-        if x not in range(0, self.x): return EDGE_0
-        if y not in range(0, self.y + 1): return EDGE_0
-        return self.data[2 * y][2 * x + 1]
+        if 0 <= x < self.x and 0 <= y <= self.y:
+            return self.data_h[y * self.x + x]
+        return EDGE_0
 
     def _set_edge_h(self, x: int, y: int, val: _Edge) -> None:
-        if x not in range(0, self.x): raise Exception('TODO: think about it')
-        if y not in range(0, self.y + 1): raise Exception('TODO: think about it')
-        self.data[2 * y][2 * x + 1] = val
+        if not (0 <= x < self.x and 0 <= y <= self.y): raise Exception('TODO: think about it')
+        i = y * self.x + x
+        if self.data_h[i] != val:
+            self.data_h[i] = val
+            for ch in self._subscribers:
+                ch.edges_h.add((x, y))
 
     def _get_edge_v(self, x: int, y: int) -> _Edge:
-        if x not in range(0, self.x + 1): return EDGE_0
-        if y not in range(0, self.y): return EDGE_0
-        return self.data[2 * y + 1][2 * x]
+        if 0 <= x <= self.x and 0 <= y < self.y:
+            return self.data_v[y * (self.x + 1) + x]
+        return EDGE_0
 
     def _set_edge_v(self, x: int, y: int, val: _Edge) -> None:
-        if x not in range(0, self.x + 1): raise Exception('TODO: think about it')
-        if y not in range(0, self.y): raise Exception('TODO: think about it')
-        self.data[2 * y + 1][2 * x] = val
+        if not (0 <= x <= self.x and 0 <= y < self.y): raise Exception('TODO: think about it')
+        i = y * (self.x + 1) + x
+        if self.data_v[i] != val:
+            self.data_v[i] = val
+            for ch in self._subscribers:
+                ch.edges_v.add((x, y))
+
+    # whole rows, for loops that should not go through getters or views
+
+    def row_nums(self, y: int, /) -> array.array[int]:
+        '''clues of cells in row y'''
+        return self.data_num[y * self.x : (y + 1) * self.x]
+
+    def row_h(self, y: int, /) -> array.array[int]:
+        '''horizontal edges on the top side of row y, 0 <= y <= self.y'''
+        return self.data_h[y * self.x : (y + 1) * self.x]
+
+    def row_v(self, y: int, /) -> array.array[int]:
+        '''vertical edges of row y, including both borders'''
+        return self.data_v[y * (self.x + 1) : (y + 1) * (self.x + 1)]
+
+    def iter_cell_edges(self) -> t.Iterator[tuple[int, int, _Num, _Edge, _Edge, _Edge, _Edge]]:
+        '''(x, y, num, top, right, bottom, left) for every cell, row by row'''
+        for y in range(self.y):
+            nums = self.row_nums(y)
+            tops = self.row_h(y)
+            bottoms = self.row_h(y + 1)
+            vs = self.row_v(y)
+            for x in range(self.x):
+                yield x, y, nums[x], tops[x], vs[x + 1], bottoms[x], vs[x]
+
+    def counts(self) -> Counts:
+        '''edge counts for the whole board at once, using only slicing and big int math'''
+        x, y = self.x, self.y
+        h = self.data_h.tobytes()
+        v = self.data_v.tobytes()
+        cells: list[bytes] = []
+        vtxs: list[bytes] = []
+        for table in (_IS_LINE, _IS_UNK):
+            hs = h.translate(table)
+            vs = v.translate(table)
+
+            # cell: top, bottom, and v-edges without the last / the first column
+            lefts = bytearray(vs)
+            del lefts[x :: x + 1]
+            rights = bytearray(vs)
+            del rights[:: x + 1]
+            cells.append(_lane_sum(hs[: x * y], hs[x:], lefts, rights))
+
+            # vertex: h-edges padded with an absent edge at the end of each row are
+            # the ones on the right, shifting them by one gives the ones on the left
+            right_h = b'\0'.join(hs[i * x : (i + 1) * x] for i in range(y + 1)) + b'\0'
+            left_h = b'\0' + right_h[:-1]
+            pad = bytes(x + 1)
+            vtxs.append(_lane_sum(left_h, right_h, pad + vs, vs + pad))
+
+        return Counts(x, y, cells[0], cells[1], vtxs[0], vtxs[1])
+
+    def copy(self) -> Board:
+        '''independent board with the same contents and no subscribers'''
+        b = Board.__new__(Board)
+        b.x = self.x
+        b.y = self.y
+        b.data_h = self.data_h[:]
+        b.data_v = self.data_v[:]
+        b.data_num = self.data_num[:]
+        b.data_vtx = self.data_vtx.copy()
+        b._subscribers = []
+        return b
+
+    def rows(self) -> t.Iterator[str]:
+        '''
+        lines of str(board) one at a time: vertex rows with horizontal edges between them,
+        and cell rows with vertical edges and clues
+        '''
+        # glyphs go into every 4th position of a row template
+        vtx_row = bytearray(b'+   ' * self.x + b'+')
+        cell_row = bytearray(b' ' * (4 * self.x + 1))
+        for y in range(self.y + 1):
+            vtx_row[2::4] = self.row_h(y).tobytes().translate(_GLYPH_H)
+            yield vtx_row.decode()
+            if y != self.y:
+                cell_row[0::4] = self.row_v(y).tobytes().translate(_GLYPH_V)
+                cell_row[2::4] = self.row_nums(y).tobytes().translate(_GLYPH_NUM)
+                yield cell_row.decode()
+
+    def write_to(self, f: t.TextIO, /) -> None:
+        '''writes str(board) row by row, without building the whole string'''
+        for i, row in enumerate(self.rows()):
+            if i:
+                f.write('\n')
+            f.write(row)
 
     def __str__(self) -> str:
-        edgev2str = {
-            EDGE_UNK: ' ',
-            EDGE_0: 'x',
-            EDGE_1: '|',
-        }
-        edgeh2str = {
-            EDGE_UNK: ' ',
-            EDGE_0: 'x',
-            EDGE_1: '-',
-        }
-
-        num2str = {
-            NUM_UNK: ' ',
-            0: '0',
-            1: '1',
-            2: '2',
-            3: '3',
-        }
-
-        vtx2str = {
-            VERTEX_UNK: '+',
-        }
-
-        s = StringBuilder()
-        for i in range(self.y + 1):
-            for j in range(self.x + 1):
-                s += vtx2str[self.vertices[j, i].value]
-                if j != self.x:
-                    s += ' '
-                    e = self.edges[j, i].top
-                    s += edgeh2str[e]
-                    s += ' '
-
-            if i != self.y:
-                s += '\n'
-                for j in range(self.x + 1):
-                    e = self.edges[j, i].left
-                    s += edgev2str[e]
-                    if j != self.x:
-                        n = self.cells[j, i].value
-                        s += ' '
-                        s += num2str[n]
-                        s += ' '
-                s += '\n'
-
-        return str(s)
-
-
-def parse_rule(s: str, initial: bool = True) -> Board:
-    lines = s.splitlines()
-    lines = [line for line in lines if line]
-    lines = [line for line in lines if not line.strip().startswith('#')]
-    if initial:
-        lines = [line.replace('(x)', '   ') for line in lines]
-        lines = [line.replace('(|)', '   ') for line in lines]
-        lines = [line.replace('(-)', '   ') for line in lines]
-
-    assert lines
-    assert len(set(map(len, lines))) == 1, set(map(len, lines))
-    x = (len(lines[0]) - 3) // 4
-    y = (len(lines) - 1) // 2
-
-    b = Board(x, y)
-
-    for j in range(y):
-        for i in range(x):
-            c = lines[j * 2 + 1][4 * i + 3]
-            if c == ' ':
-                pass
-            if c in '0123':
-                b._set_num(i, j, int(c))
-
-    for j in range(y):
-        for i in range(x + 1):
-            c = lines[j * 2 + 1][4 * i + 1]
-            if c == ' ':
-                pass
-            if c == '|':
-                b._set_edge_v(i, j, EDGE_1)
-            if c == 'x':
-                b._set_edge_v(i, j, EDGE_0)
-
-    for j in range(y + 1):
-        for i in range(x):
-            c = lines[j * 2][4 * i + 3]
-            if c == ' ':
-                pass
-            if c == '-':
-                b._set_edge_h(i, j, EDGE_1)
-            if c == 'x':
-                b._set_edge_h(i, j, EDGE_0)
-
-    return b
-
-
-def make_random_board(n: int) -> Board:
-    b = Board(n, n)
-    # b.set_num(2, 2, 3)
-    # b.set_edge_h(2, 2, STATE_1)
-    # b.set_edge_h(3, 3, STATE_0)
-    # b.set_edge_v(4, 4, STATE_1)
-    # b.set_edge_v(5, 5, STATE_0)
-
-    import random
-
-    for _ in range(n ** 2 // 2):
-        x = random.randrange(0, b.x)
-        y = random.randrange(0, b.y)
-        v = random.choice([0, 1, 2, 3])
-        b._set_num(x, y, v)
-
-    for _ in range(n ** 2 // 2):
-        x = random.randrange(0, b.x + 1)
-        y = random.randrange(0, b.y)
-        v = random.choice([0, 1])
-        b._set_edge_v(x, y, v)
-
-    for _ in range(n ** 2 // 2):
-        x = random.randrange(0, b.x)
-        y = random.randrange(0, b.y + 1)
-        v = random.choice([0, 1])
-        b._set_edge_h(x, y, v)
-    return b
-
-    # print(b)
-    # print()
-
-
-def test_rule() -> None:
-    rules = open('rules.sli').read().split('\n\n')
-    rules = [r for r in rules if r.strip()]
-    rule = rules[38 + 3]
-    print(rule)
-    print()
-    print(parse_rule(rule))
-    print('=>')
-    print(parse_rule(rule, False))
+        return '\n'.join(self.rows())
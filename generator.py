@@ -0,0 +1,242 @@
+from __future__ import annotations
+import typing as t
+import array
+import itertools
+import random
+
+import game
+import rules
+import sat
+import solver
+from rules import Contradiction
+
+# the easiest kind of reasoning a puzzle can be solved with
+type Difficulty = int
+DIFFICULTY_BASIC: t.Final[Difficulty] = 0  # clue and vertex counting, inside / outside colouring
+DIFFICULTY_RULES: t.Final[Difficulty] = 1  # plus the rules from rules.sli
+DIFFICULTY_SEARCH: t.Final[Difficulty] = 2  # needs trial and error
+DIFFICULTY_NAMES: t.Final = ('basic', 'rules', 'search')
+
+# effort of a uniqueness check while generating: nodes of the search, then conflicts and rounds of SAT
+_SEARCH_NODES: t.Final = 200
+_SAT_CONFLICTS: t.Final = 1000
+_SAT_ROUNDS: t.Final = 50
+# random loops tried before generate gives up on a size
+_ATTEMPTS: t.Final = 100
+
+
+def random_loop(w: int, h: int, rng: random.Random, /, fill: float = 0.55) -> game.Board:
+    '''
+    board with the edges of a random loop and no clues
+
+    the loop is the border of a region grown from the middle cell one cell at a time,
+    a cell joins only if the region cells around it form a single run,
+    so the region stays connected and without holes and its border never touches itself;
+    it has at least two cells, a single cell would need a clue of 4
+    '''
+    if w * h < 2:
+        raise ValueError(f'no loop fits a {w}x{h} board')
+    # region of the board with a margin of one cell, which never joins
+    W = w + 2
+    inside = bytearray(W * (h + 2))
+    ring = (-W, -W + 1, 1, W + 1, W, W - 1, -1, -W - 1)
+    start = (h // 2 + 1) * W + w // 2 + 1
+    inside[start] = 1
+    cells = [start]
+    target = max(2, int(fill * w * h))
+    for _ in range(100 * target):
+        if len(cells) >= target:
+            break
+        i = rng.choice(cells) + rng.choice((-W, 1, W, -1))
+        if inside[i] or not (0 < i % W <= w and W <= i < W * (h + 1)):
+            continue
+        around = [inside[i + d] for d in ring]
+        if sum(around[k] and not around[k - 1] for k in range(8)) == 1:
+            inside[i] = 1
+            cells.append(i)
+
+    b = game.Board(w, h)
+    for y in range(h + 1):
+        for x in range(w):
+            b._set_edge_h(x, y, int(inside[y * W + x + 1] != inside[(y + 1) * W + x + 1]))
+    for y in range(h):
+        for x in range(w + 1):
+            b._set_edge_v(x, y, int(inside[(y + 1) * W + x] != inside[(y + 1) * W + x + 1]))
+    return b
+
+
+class _Checker:
+    '''
+    tells if a puzzle stays uniquely solvable at a difficulty while its clues are removed
+
+    checks share the tables and the deductions of one solver, and for DIFFICULTY_SEARCH
+    one SAT instance with a selector per clue, so clauses learnt for one check help with the next ones
+    '''
+
+    def __init__(self, puzzle: game.Board, solution: game.Board, difficulty: Difficulty, /) -> None:
+        self.puzzle = puzzle
+        self.solver = solver.Solver(puzzle, rules.load_rules() if difficulty >= DIFFICULTY_RULES else None)
+        self.enc: sat.Encoding | None = None
+        if difficulty >= DIFFICULTY_SEARCH:
+            self.enc = sat.Encoding(puzzle, guarded=True)
+            self.sat = sat.CdclSolver(self.enc.cnf.nvars)
+            for c in self.enc.cnf.clauses:
+                self.sat.add_clause(c)
+            # any model is a second solution
+            lines = [*solution.data_h, *solution.data_v]
+            self.sat.add_clause(-(e + 1) for e, v in enumerate(lines) if v == game.EDGE_1)
+            # other solutions are searched for close to the known one
+            for e, v in enumerate(lines):
+                self.sat.suggest(e + 1 if v == game.EDGE_1 else -(e + 1))
+            self.active = dict.fromkeys(self.enc.selectors)
+
+    def _unique(self, without: int = -1, /, max_conflicts: int | None = None, max_rounds: int | None = None) -> bool:
+        '''raises SearchLimit after max_conflicts conflicts in total or max_rounds rounds of cuts'''
+        enc = self.enc
+        assert enc is not None
+        # the checked clue is off, so that loops are not cut only by it
+        assumptions = [-enc.selectors[c] if c == without else enc.selectors[c] for c in self.active]
+        # deductions follow from the clues, but unit propagation would not find most of them
+        for e, v in enumerate(self.solver.state):
+            if v != game.EDGE_UNK:
+                assumptions.append(e + 1 if v == game.EDGE_1 else -(e + 1))
+        for c, col in enumerate(self.solver.color[:-1]):
+            if col != solver.COLOR_UNK:
+                assumptions.append(enc.cell_var(c) if col == solver.COLOR_IN else -enc.cell_var(c))
+
+        limit = None if max_conflicts is None else self.sat.conflicts + max_conflicts
+        for rounds in itertools.count():
+            if max_rounds is not None and rounds >= max_rounds:
+                raise solver.SearchLimit(f'no answer after {rounds} rounds')
+            if not self.sat.solve(assumptions, None if limit is None else max(0, limit - self.sat.conflicts)):
+                break
+            added = len(enc.cnf.clauses)
+            if enc.cut_cycles(self.sat.model()) is not None:
+                return False
+            for clause in enc.cnf.clauses[added:]:
+                self.sat.add_clause(clause)
+        return True
+
+    def _search_unique(self, without: int, /) -> bool:
+        '''
+        a small search from the deductions is usually enough, SAT handles the rest;
+        when both give up the clue is kept, which is always safe
+        '''
+        try:
+            return sum(1 for _ in itertools.islice(self.solver.solutions(_SEARCH_NODES, probe=False), 2)) == 1
+        except solver.SearchLimit:
+            pass
+        try:
+            return self._unique(without, _SAT_CONFLICTS, _SAT_ROUNDS)
+        except solver.SearchLimit:
+            return False
+
+    def _add_clues(self, cs: t.Iterable[int], /) -> None:
+        s = self.solver
+        for c in cs:
+            s.set_clue(c, self.puzzle.data_num[c])
+            s.queue_clue(c)
+        s.propagate()
+
+    def solves(self) -> bool:
+        '''the puzzle with its current clues'''
+        s = self.solver
+        s.reset()
+        try:
+            s.propagate()
+        except Contradiction:
+            return False
+        return s.closed() or (self.enc is not None and self._unique())
+
+    def sweep(self, cs: list[int], /) -> None:
+        '''
+        removes clues one by one in the given order, each one if the puzzle still solves without it
+
+        the clues are split in halves: the first half is swept on the deductions made
+        with the clues of the second one, then the second half on the deductions made
+        with what is left of the first one; so every check starts from a state that
+        already has the deductions of almost all other clues, instead of from scratch
+        '''
+        s = self.solver
+        for c in cs:
+            s.set_clue(c, game.NUM_UNK)
+        s.reset()
+        s.propagate()
+        self._sweep(cs)
+
+    def _sweep(self, cs: list[int], /) -> None:
+        # the solver has the deductions of all clues except cs, which are unset in it
+        s = self.solver
+        if len(cs) == 1:
+            c = cs[0]
+            if s.closed() or (self.enc is not None and self._search_unique(c)):
+                self.puzzle.data_num[c] = game.NUM_UNK
+                if self.enc is not None:
+                    del self.active[c]
+                    self.sat.add_clause([-self.enc.selectors[c]])
+            else:
+                s.set_clue(c, self.puzzle.data_num[c])
+            return
+
+        left = cs[: len(cs) // 2]
+        right = cs[len(cs) // 2 :]
+        mark = len(s.trail)
+        self._add_clues(right)
+        self._sweep(left)
+        s.undo(mark)
+        for c in right:
+            s.set_clue(c, game.NUM_UNK)
+        self._add_clues(c for c in left if self.puzzle.data_num[c] != game.NUM_UNK)
+        self._sweep(right)
+
+
+def generate(
+    w: int,
+    h: int,
+    /,
+    difficulty: Difficulty = DIFFICULTY_RULES,
+    *,
+    rng: random.Random | None = None,
+    fill: float = 0.55,
+) -> game.Board:
+    '''
+    puzzle with a unique solution that needs at most the given difficulty:
+    starts with all clues of a random loop and removes clues in random order while that holds;
+    raises ValueError if no loop of the size is solvable from its clues in a number of attempts
+    '''
+    if rng is None:
+        rng = random.Random()
+    for _ in range(_ATTEMPTS):
+        solution = random_loop(w, h, rng, fill)
+        puzzle = game.Board(w, h)
+        puzzle.data_num = array.array('b', solution.counts().cell_lines)
+        check = _Checker(puzzle, solution, difficulty)
+        # rarely even all clues of a loop are not enough
+        if check.solves():
+            break
+    else:
+        raise ValueError(f'no {w}x{h} puzzle at difficulty {DIFFICULTY_NAMES[difficulty]} in {_ATTEMPTS} attempts')
+
+    order = list(range(w * h))
+    rng.shuffle(order)
+    check.sweep(order)
+    return puzzle
+
+
+def rate(board: game.Board, /) -> Difficulty | None:
+    '''easiest difficulty the puzzle can be solved at, None if it has no unique solution'''
+    for difficulty, ruleset in ((DIFFICULTY_BASIC, None), (DIFFICULTY_RULES, rules.load_rules())):
+        try:
+            s = solver.Solver(board, ruleset)
+            s.propagate()
+        except Contradiction:
+            return None
+        if game.EDGE_UNK not in s.state:
+            return difficulty
+
+    solution = sat.solve(board)
+    if solution is None:
+        return None
+    if _Checker(board.copy(), solution, DIFFICULTY_SEARCH)._unique():
+        return DIFFICULTY_SEARCH
+    return None
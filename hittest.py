@@ -0,0 +1,87 @@
+'''
+what a point of the window is on, found by arithmetic on View coordinates:
+the nearest vertex or edge if it is close enough, else the cell under the point;
+the tolerances are parts of a cell, so they grow with the zoom, but never get below a few pixels
+unless that would leave no room for the cells
+'''
+from __future__ import annotations
+import typing as t
+import dataclasses
+import math
+
+import game
+from point import Point
+from view import View
+
+type HitKind = str
+HIT_VERTEX: t.Final[HitKind] = 'vertex'
+HIT_EDGE_H: t.Final[HitKind] = 'edge-h'
+HIT_EDGE_V: t.Final[HitKind] = 'edge-v'
+HIT_CELL: t.Final[HitKind] = 'cell'
+
+# largest distance from a vertex along both axes and from an edge, in cells
+VERTEX_TOLERANCE: t.Final = 0.125
+EDGE_TOLERANCE: t.Final = 0.2
+# smallest tolerance in pixels, for small zooms
+MIN_TOLERANCE_PIXELS: t.Final = 4
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Hit:
+    kind: HitKind
+    # coordinates of the vertex, edge or cell as in game.Board
+    x: int
+    y: int
+
+
+def tolerances(zoom: float, /) -> tuple[float, float]:
+    '''
+    (vertex, edge) tolerances at a zoom, in cells; however small the cells get,
+    the edges leave the middle of every cell to it, at least as wide as a vertex is
+    '''
+    vertex = min(0.25, max(VERTEX_TOLERANCE, MIN_TOLERANCE_PIXELS / zoom))
+    edge = min(0.5 - vertex, max(EDGE_TOLERANCE, MIN_TOLERANCE_PIXELS / zoom))
+    return vertex, edge
+
+
+def hit_test(board: game.Board, view: View, pos: Point, /) -> Hit | None:
+    '''element of the board under pos, a point of the image; None outside of the board'''
+    p = view.unmap(pos)
+    tv, te = tolerances(view.zoom_k)
+    # the nearest vertex and the distances to its grid lines
+    vx, vy = round(p.x), round(p.y)
+    dx, dy = abs(p.x - vx), abs(p.y - vy)
+    cx, cy = math.floor(p.x), math.floor(p.y)
+
+    if dx <= tv and dy <= tv:
+        if 0 <= vx <= board.x and 0 <= vy <= board.y:
+            return Hit(HIT_VERTEX, vx, vy)
+        return None
+    if dx <= te and dx <= dy:
+        if 0 <= vx <= board.x and 0 <= cy < board.y:
+            return Hit(HIT_EDGE_V, vx, cy)
+        return None
+    if dy <= te:
+        if 0 <= cx < board.x and 0 <= vy <= board.y:
+            return Hit(HIT_EDGE_H, cx, vy)
+        return None
+    if 0 <= cx < board.x and 0 <= cy < board.y:
+        return Hit(HIT_CELL, cx, cy)
+    return None
+
+
+def hits_along(board: game.Board, view: View, start: Point, end: Point, /) -> list[Hit]:
+    '''
+    elements under a segment of the image from start to end, in order, each once per stay under it,
+    for a drag of the mouse that moved further than one element between two events
+    '''
+    _, te = tolerances(view.zoom_k)
+    # steps shorter than an edge is wide, so that none is stepped over
+    step = max(1.0, te * view.zoom_k)
+    n = max(1, math.ceil(start.dist(end) / step))
+    res: list[Hit] = []
+    for i in range(n + 1):
+        h = hit_test(board, view, start + (end - start) * (i / n))
+        if h is not None and (not res or res[-1] != h):
+            res.append(h)
+    return res
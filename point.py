@@ -180,6 +180,21 @@ _set_x: Callable[[_PointCommon, float], None] = _PointCommon.x.__set__  # type:
 _set_y: Callable[[_PointCommon, float], None] = _PointCommon.y.__set__  # type: ignore[attr-defined, misc]
 
 
+_new_object: t.Final = object.__new__
+
+
+def _point(x: float, y: float, /) -> Point:
+    """
+    Point(x, y) without a call of __init__, for the operators;
+    the slots are still set through their descriptors: a Point backed by a tuple is made
+    2.5x faster, but its coordinates are read 2.5x slower, and they are read more often
+    """
+    p = _new_object(Point)
+    _set_x(p, x)
+    _set_y(p, y)
+    return p
+
+
 class Point(_PointCommon):
     """
     Immutable
@@ -207,6 +222,25 @@ class Point(_PointCommon):
     def __pos__(self, /) -> t.Self:
         return self
 
+    # the common operators without __init__, they make most of the points
+    def __add__(self, other: _PointCommon, /) -> Point:
+        return _point(self.x + other.x, self.y + other.y)
+
+    def __sub__(self, other: _PointCommon, /) -> Point:
+        return _point(self.x - other.x, self.y - other.y)
+
+    def __mul__(self, other: float, /) -> Point:
+        return _point(self.x * other, self.y * other)
+
+    def __rmul__(self, other: float, /) -> Point:
+        return _point(other * self.x, other * self.y)
+
+    def __truediv__(self, other: float, /) -> Point:
+        return _point(self.x / other, self.y / other)
+
+    def __neg__(self, /) -> Point:
+        return _point(-self.x, -self.y)
+
     def __setattr__(self, attr: str, val: t.Any, /) -> None:
         if hasattr(self, attr):
             raise AttributeError(
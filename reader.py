@@ -0,0 +1,186 @@
+'''
+streaming readers of boards in text form
+
+two formats are read, in any mix:
+    the layout of rules.sli, a block of lines ended by an empty line
+        +   +   +
+          3
+        + - +   +
+    one puzzle per line, clues row by row: '.' for a cell without a clue, 0-3 for a clue,
+    optionally after a 'WxH:' size (square without it) and with the letters a-z
+    for runs of 1-26 cells without clues, as in the game ids of Simon Tatham's loopy
+        ..3.2....
+        5x5t0:a3b2e1c0h3a
+lines starting with '#' are comments; only one board is held in memory at a time
+'''
+from __future__ import annotations
+import typing as t
+import array
+import re
+
+import game
+
+
+class ParseError(ValueError):
+    '''malformed input, line is 1-based'''
+
+    line: int
+    msg: str
+
+    def __init__(self, line: int, msg: str, /) -> None:
+        super().__init__(f'line {line}: {msg}')
+        self.line = line
+        self.msg = msg
+
+    def __reduce__(self) -> tuple[type[ParseError], tuple[int, str]]:
+        # pickled for worker processes with the arguments of __init__, not the formatted message
+        return type(self), (self.line, self.msg)
+
+
+_EDGE_H: t.Final = {' ': game.EDGE_UNK, 'x': game.EDGE_0, '-': game.EDGE_1}
+_EDGE_V: t.Final = {' ': game.EDGE_UNK, 'x': game.EDGE_0, '|': game.EDGE_1}
+_NUM: t.Final = {' ': game.NUM_UNK, '0': 0, '1': 1, '2': 2, '3': 3}
+# conclusions of a rule, read as unknown for its premise
+_MARKS: t.Final = ('(x)', '(|)', '(-)')
+
+_LINE_NUM: t.Final = {'.': game.NUM_UNK, '0': 0, '1': 1, '2': 2, '3': 3}
+_LINE_RE: t.Final = re.compile(r'(?:(\d+)x(\d+)(?:t(\d+))?(?:d[a-z])?:)?([.0-3a-z]+)')
+
+
+def _values(n: int, line: str, start: int, table: dict[str, int], /) -> list[int]:
+    '''values of every 4th character of a line from start'''
+    try:
+        return [table[c] for c in line[start::4]]
+    except KeyError:
+        for col in range(start, len(line), 4):
+            if line[col] not in table:
+                raise ParseError(n, f'unexpected {line[col]!r} in column {col + 1}') from None
+        raise
+
+
+def parse_art(lines: t.Iterable[str], first_line: int = 1, /, *, initial: bool = True) -> game.Board:
+    '''
+    board drawn in the layout of rules.sli, lines are numbered from first_line in errors;
+    marked conclusions like (x) are read as unknown in the initial board and as set otherwise
+    '''
+    rows: list[tuple[int, str]] = []
+    for n, line in enumerate(lines, first_line):
+        if not line or line.lstrip().startswith('#'):
+            continue
+        if initial:
+            for mark in _MARKS:
+                line = line.replace(mark, '   ')
+        rows.append((n, line))
+    if not rows:
+        raise ParseError(first_line, 'no board')
+    n0, line0 = rows[0]
+    for n, line in rows:
+        if len(line) != len(line0):
+            raise ParseError(n, f'line has {len(line)} characters, the first one has {len(line0)}')
+    if len(line0) < 3 or (len(line0) - 3) % 4 or len(rows) % 2 == 0:
+        raise ParseError(n0, f'{len(rows)} lines of {len(line0)} characters do not make a board')
+
+    b = game.Board((len(line0) - 3) // 4, len(rows) // 2)
+    h: list[int] = []
+    v: list[int] = []
+    nums: list[int] = []
+    for i, (n, line) in enumerate(rows):
+        if i % 2 == 0:
+            h += _values(n, line, 3, _EDGE_H)
+        else:
+            v += _values(n, line, 1, _EDGE_V)
+            nums += _values(n, line, 3, _NUM)
+    b.data_h = array.array('b', h)
+    b.data_v = array.array('b', v)
+    b.data_num = array.array('b', nums)
+    return b
+
+
+def parse_line(s: str, line: int = 1, /) -> game.Board:
+    '''puzzle in the one line format'''
+    m = _LINE_RE.fullmatch(s)
+    if m is None:
+        raise ParseError(line, f'not a puzzle: {s[:40]!r}')
+    w, h, grid, clues = m.groups()
+    if grid is not None and grid != '0':
+        raise ParseError(line, f'only square grids are supported, got grid type {grid}')
+
+    nums: list[int] = []
+    for c in clues:
+        if c in _LINE_NUM:
+            nums.append(_LINE_NUM[c])
+        else:
+            nums += [game.NUM_UNK] * (ord(c) - ord('a') + 1)
+    if w is None:
+        side = round(len(nums) ** 0.5)
+        if side * side != len(nums):
+            raise ParseError(line, f'{len(nums)} cells do not make a square, give the size as WxH:')
+        x = y = side
+    else:
+        x, y = int(w), int(h)
+        if x * y != len(nums):
+            raise ParseError(line, f'{len(nums)} cells given for a {x}x{y} board')
+
+    b = game.Board(x, y)
+    b.data_num = array.array('b', nums)
+    return b
+
+
+def blocks(f: t.Iterable[str], /) -> t.Iterator[tuple[int, list[str]]]:
+    '''groups of lines between empty lines, with the number of their first line, comments included'''
+    start = 0
+    lines: list[str] = []
+    for n, line in enumerate(f, 1):
+        line = line.rstrip('\r\n')
+        if line:
+            if not lines:
+                start = n
+            lines.append(line)
+        elif lines:
+            yield start, lines
+            lines = []
+    if lines:
+        yield start, lines
+
+
+def read_records(f: t.Iterable[str], /) -> t.Iterator[game.Board | ParseError]:
+    '''
+    boards of a text stream in either format, one at a time, with a ParseError in place of every malformed one;
+    reading goes on after it, a block of art always ends at an empty line
+    '''
+    art: list[str] = []
+    start = 0
+    for n, line in enumerate(f, 1):
+        line = line.rstrip('\r\n')
+        if art:
+            if line:
+                art.append(line)
+            else:
+                yield _parse(parse_art, art, start)
+                art = []
+            continue
+        s = line.strip()
+        if not s or s.startswith('#'):
+            continue
+        if s.startswith('+'):
+            start = n
+            art.append(line)
+        else:
+            yield _parse(parse_line, s, n)
+    if art:
+        yield _parse(parse_art, art, start)
+
+
+def _parse[T](fn: t.Callable[[T, int], game.Board], src: T, line: int, /) -> game.Board | ParseError:
+    try:
+        return fn(src, line)
+    except ParseError as e:
+        return e
+
+
+def read_boards(f: t.Iterable[str], /) -> t.Iterator[game.Board]:
+    '''boards of a text stream in either format, one at a time; raises ParseError at the first malformed one'''
+    for rec in read_records(f):
+        if isinstance(rec, ParseError):
+            raise rec
+        yield rec
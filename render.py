@@ -0,0 +1,613 @@
+'''
+drawing of a board, shared by the window of main.App and offscreen rendering
+'''
+from __future__ import annotations
+from typing import Final
+from math import floor
+import typing as t
+import array
+import collections
+import dataclasses
+import functools
+import math
+import os
+import time
+
+import pygame as pg
+
+from point import Point
+import game
+import hittest
+from view import View
+from draw_utils import (
+    draw_dashed_line,
+    draw_line,
+    get_font,
+    pixel,
+)
+
+Color = tuple[int, int, int]
+COLOR_UNK: Final[Color] = (64, 64, 64)
+COLOR_0: Final[Color] = (0, 0, 0)
+COLOR_1: Final[Color] = (255, 255, 255)
+COLOR_BG: Final[Color] = (0, 0, 0)
+COLOR_VTX_GOOD: Final[Color] = (127, 127, 127)
+COLOR_VTX_BAD: Final[Color] = (255, 0, 0)
+COLOR_NUM_GOOD: Final[Color] = (127, 127, 127)
+COLOR_NUM_BAD: Final[Color] = (255, 127, 127)
+COLOR_HOVER: Final[Color] = (255, 191, 0)
+
+
+CELL_SIZE = 64
+NUM_SIZE: Final = 52
+LINE_THICKNESS: Final = 4
+VERTEX_SIZE: Final = 6
+DASHES_CNT: Final = 5
+
+# tiles are about this many pixels wide, a whole number of cells
+TILE_PIXELS: Final = 256
+# cached tiles of all zoom levels together, about 4 bytes each
+TILE_CACHE_PIXELS: Final = 32 * 1024 * 1024
+
+# the glow is kept at 1/GLOW_SCALE of the target resolution, or less to have at most GLOW_PIXELS pixels
+GLOW_SCALE: Final = 4
+GLOW_PIXELS: Final = 256 * 256
+# box blur radii applied every frame, in pixels of the target
+GLOW_BLUR: Final = (8, 4)
+# brightness kept by the glow every frame, out of 256
+GLOW_FADE: Final = 250
+# frames a change keeps the glow around it moving
+GLOW_FRAMES: Final = 30
+# pixels of the glow around a change that it reaches
+GLOW_SPREAD: Final = 8
+# seconds a frame of glow may take; after GLOW_SLOW_FRAMES slower frames in a row it is switched off
+GLOW_BUDGET: Final = 0.016
+GLOW_SLOW_FRAMES: Final = 10
+
+
+state2color: Final = {
+    game.EDGE_UNK: COLOR_UNK,
+    game.EDGE_0: COLOR_0,
+    game.EDGE_1: COLOR_1,
+}
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Visible:
+    '''
+    cells x0 <= x < x1, y0 <= y < y1 that are at least partly on the target;
+    every layer draws only the elements of these cells, the elements on their borders included
+    '''
+
+    x0: int
+    y0: int
+    x1: int
+    y1: int
+
+
+def visible(board: game.Board, view: View, size: Point, /) -> Visible:
+    '''cells of the board seen through view on a target of the given size'''
+    x0, y0 = view.unmap(Point.p00).floor()
+    x1, y1 = view.unmap(size).floor()
+    return Visible(max(0, x0), max(0, y0), min(board.x, x1 + 1), min(board.y, y1 + 1))
+
+
+class Renderer:
+    __slots__ = ('board', 'tiles', 'glow')
+
+    def __init__(self, board: game.Board, /, *, tiled: bool = False) -> None:
+        '''a tiled renderer keeps drawn tiles of the board and redraws only the changed ones'''
+        self.board = board
+        self.tiles = TileCache(self) if tiled else None
+        # made by the first frame drawn with glow
+        self.glow: Glow | None = None
+
+    def draw(self, target: pg.Surface, view: View, /, *, glow: bool = True) -> None:
+        '''
+        draws the visible part of the board onto target as seen through view, directly at its zoom;
+        with glow a blurred trail of the previous frames shines under it, see Glow
+        '''
+        target.fill(COLOR_BG)
+        vis = visible(self.board, view, Point.from_tuple(target.get_size()))
+        if self.tiles is not None:
+            self.tiles.draw(target, view, vis)
+        else:
+            self.draw_layers(target, view, vis, self.board.counts())
+
+        if glow:
+            if self.glow is None:
+                self.glow = Glow(self.board)
+            self.glow.apply(target, view)
+
+    def draw_layers(self, target: pg.Surface, view: View, vis: Visible, counts: game.Counts) -> None:
+        self.draw_nums(target, view, vis, counts)
+        self.draw_edges(target, view, vis)
+        self.draw_vertices(target, view, vis, counts)
+
+    def close(self) -> None:
+        if self.tiles is not None:
+            self.tiles.close()
+        if self.glow is not None:
+            self.glow.close()
+
+    def draw_nums(self, target: pg.Surface, view: View, vis: Visible, counts: game.Counts) -> None:
+        b = self.board
+        nums = sprites(view.zoom_k).nums
+        lines = counts.cell_lines
+        xs, ys = view.map_many(range(vis.x0, vis.x1), range(vis.y0, vis.y1))
+        seq: list[tuple[pg.Surface, tuple[int, int]]] = []
+        for y, sy in zip(range(vis.y0, vis.y1), ys):
+            row = b.row_nums(y)
+            for x, sx in zip(range(vis.x0, vis.x1), xs):
+                num = row[x]
+                if num == game.NUM_UNK:
+                    continue
+                s = nums[num, num != lines[y * b.x + x]]
+                seq.append((s.image, (floor(sx + s.offset.x + 0.5), floor(sy + s.offset.y + 0.5))))
+        target.blits(seq, doreturn=False)
+
+    def draw_vertices(self, target: pg.Surface, view: View, vis: Visible, counts: game.Counts) -> None:
+        b = self.board
+        good, bad = sprites(view.zoom_k).vertices
+        lines = counts.vtx_lines
+        # both sprites have the same offset
+        xs, ys = _pixels(view, good.offset, range(vis.x0, vis.x1 + 1), range(vis.y0, vis.y1 + 1))
+        seq: list[tuple[pg.Surface, tuple[int, int]]] = []
+        for y, sy in zip(range(vis.y0, vis.y1 + 1), ys):
+            i = y * (b.x + 1)
+            for x, sx in zip(range(vis.x0, vis.x1 + 1), xs):
+                seq.append((good.image if lines[i + x] <= 2 else bad.image, (sx, sy)))
+        target.blits(seq, doreturn=False)
+
+    def draw_edges(self, target: pg.Surface, view: View, vis: Visible) -> None:
+        b = self.board
+        sp = sprites(view.zoom_k)
+        seq: list[tuple[pg.Surface, tuple[int, int]]] = []
+
+        # the sprites of an orientation have the same offset
+        images = {state: s.image for state, s in sp.edges_v.items()}
+        offset = sp.edges_v[game.EDGE_1].offset
+        xs, ys = _pixels(view, offset, range(vis.x0, vis.x1 + 1), range(vis.y0, vis.y1))
+        for y, sy in zip(range(vis.y0, vis.y1), ys):
+            row = b.row_v(y)
+            for x, sx in zip(range(vis.x0, vis.x1 + 1), xs):
+                image = images.get(row[x])
+                if image is not None:
+                    seq.append((image, (sx, sy)))
+
+        images = {state: s.image for state, s in sp.edges_h.items()}
+        offset = sp.edges_h[game.EDGE_1].offset
+        xs, ys = _pixels(view, offset, range(vis.x0, vis.x1), range(vis.y0, vis.y1 + 1))
+        for y, sy in zip(range(vis.y0, vis.y1 + 1), ys):
+            row = b.row_h(y)
+            for x, sx in zip(range(vis.x0, vis.x1), xs):
+                image = images.get(row[x])
+                if image is not None:
+                    seq.append((image, (sx, sy)))
+
+        target.blits(seq, doreturn=False)
+
+
+def _pixels(
+    view: View,
+    offset: Point,
+    xs: t.Iterable[float],
+    ys: t.Iterable[float],
+    /,
+) -> tuple[list[int], list[int]]:
+    '''draw_utils.pixel of the mapped coordinates moved by offset, for both axes at once'''
+    mx, my = view.map_many(xs, ys)
+    ox, oy = offset
+    return [floor(x + ox + 0.5) for x in mx], [floor(y + oy + 0.5) for y in my]
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Sprite:
+    image: pg.Surface
+    # from the mapped point the sprite is drawn at to the top left corner of image, in whole pixels,
+    # so that the image is where the point is rounded to, wherever the target starts
+    offset: Point
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Sprites:
+    '''
+    images the board is drawn of at one zoom level;
+    clues and vertices at the top left corner of their cell and their point, edges at their first vertex
+    '''
+
+    # (clue, whether it does not match the lines around it) -> sprite
+    nums: dict[tuple[int, bool], Sprite]
+    # edge state -> sprite, edges without a line are not drawn
+    edges_h: dict[int, Sprite]
+    edges_v: dict[int, Sprite]
+    # good, bad
+    vertices: tuple[Sprite, Sprite]
+
+
+@functools.lru_cache(maxsize=16)
+def sprites(zoom: float, /) -> Sprites:
+    '''sprites of a zoom level, drawn the first time it is used'''
+    k = zoom / CELL_SIZE
+
+    font = get_font(max(1, round(NUM_SIZE * k)))
+    nums: dict[tuple[int, bool], Sprite] = {}
+    for num in range(4):
+        for bad, color in ((False, COLOR_NUM_GOOD), (True, COLOR_NUM_BAD)):
+            image = font.render(str(num), True, color)
+            offset = (Point(zoom, zoom) - Point.from_tuple(image.get_size())) / 2
+            nums[num, bad] = Sprite(image, Point.from_tuple(pixel(offset)))
+
+    width = max(1, round(LINE_THICKNESS * k))
+    # lines are drawn a pixel of the base size up and left, so that they are centered on the vertices
+    shift = Point.p11 * k
+    # a margin of width around the line
+    start = Point(width, width)
+    side = round(zoom)
+    edges_h: dict[int, Sprite] = {}
+    edges_v: dict[int, Sprite] = {}
+    for edges, end in ((edges_h, Point(side, 0)), (edges_v, Point(0, side))):
+        for state in (game.EDGE_UNK, game.EDGE_1):
+            image = pg.Surface((end + start * 2 + Point.p11).floor(), flags=pg.SRCALPHA)
+            if state == game.EDGE_UNK:
+                draw_dashed_line(image, state2color[state], start, start + end, dash_count=DASHES_CNT, width=width)
+            else:
+                draw_line(image, state2color[state], start, start + end, width=width)
+            edges[state] = Sprite(image, Point.from_tuple(pixel(-shift - start)))
+
+    radius = max(1, round(VERTEX_SIZE * k))
+    vertices: list[Sprite] = []
+    for color in (COLOR_VTX_GOOD, COLOR_VTX_BAD):
+        image = pg.Surface((2 * radius + 2, 2 * radius + 2), flags=pg.SRCALPHA)
+        pg.draw.circle(image, color, (radius + 1, radius + 1), radius)
+        vertices.append(Sprite(image, Point(-radius - 1, -radius - 1)))
+
+    return Sprites(nums, edges_h, edges_v, (vertices[0], vertices[1]))
+
+
+class _ShiftedView(View):
+    '''view moved by whole pixels, exactly, unlike a change of pos'''
+
+    shift: Point
+
+    def __init__(self, zoom: float, pos: Point, shift: Point) -> None:
+        super().__init__(zoom, pos)
+        self.shift = shift
+
+    def map(self, pos: Point, /) -> Point:
+        return super().map(pos) + self.shift
+
+    def unmap(self, pos: Point, /) -> Point:
+        return super().unmap(pos - self.shift)
+
+    def map_many(
+        self,
+        xs: t.Iterable[float],
+        ys: t.Iterable[float],
+        /,
+    ) -> tuple[array.array[float], array.array[float]]:
+        mx, my = super().map_many(xs, ys)
+        sx, sy = self.shift
+        return array.array('d', [x + sx for x in mx]), array.array('d', [y + sy for y in my])
+
+    def unmap_many(
+        self,
+        xs: t.Iterable[float],
+        ys: t.Iterable[float],
+        /,
+    ) -> tuple[array.array[float], array.array[float]]:
+        sx, sy = self.shift
+        return super().unmap_many([x - sx for x in xs], [y - sy for y in ys])
+
+
+class TileCache:
+    '''
+    drawn squares of the board, a tile per mip level and position, least recently used ones are dropped;
+    a tile is drawn again only when an element in or next to it changes, found out from board changes
+    '''
+
+    __slots__ = ('renderer', 'changes', 'tiles', 'pixels', 'zooms', 'scratch', 'scaled')
+
+    def __init__(self, renderer: Renderer, /) -> None:
+        self.renderer = renderer
+        self.changes = renderer.board.subscribe()
+        # (zoom, tile x, tile y) -> tile, in the order of use
+        self.tiles: collections.OrderedDict[tuple[float, int, int], pg.Surface] = collections.OrderedDict()
+        self.pixels = 0
+        # zoom -> number of its tiles in the cache
+        self.zooms: collections.Counter[float] = collections.Counter()
+        # tiles put together at a mip level, and scaled to the zoom, reused while the target keeps its size
+        self.scratch = pg.Surface((0, 0), flags=pg.SRCALPHA)
+        self.scaled = pg.Surface((0, 0), flags=pg.SRCALPHA)
+
+    def close(self) -> None:
+        self.renderer.board.unsubscribe(self.changes)
+
+    @staticmethod
+    def cells(zoom: float, /) -> int:
+        '''cells of a tile side at a zoom level'''
+        return max(1, int(TILE_PIXELS // zoom))
+
+    @staticmethod
+    def pad(zoom: float, /) -> int:
+        '''pixels around a tile that vertices and lines on its border stick out into'''
+        k = zoom / CELL_SIZE
+        return round(VERTEX_SIZE * k) + round(LINE_THICKNESS * k) + 2
+
+    def invalidate(self) -> None:
+        '''drops tiles with elements changed since the last call'''
+        ch = self.changes.drain()
+        if not ch:
+            return
+        changed = ch.cells | ch.vertices | ch.edges_h | ch.edges_v
+        if len(changed) > len(self.tiles):
+            self.tiles.clear()
+            self.pixels = 0
+            self.zooms.clear()
+            return
+        for zoom in list(self.zooms):
+            n = self.cells(zoom)
+            # an edge also changes the clue colours of its cells and the colours of its vertices
+            keys = {
+                (zoom, (x + dx) // n, (y + dy) // n)
+                for x, y in changed
+                for dx in (-1, 0, 1)
+                for dy in (-1, 0, 1)
+            }
+            for key in keys:
+                tile = self.tiles.pop(key, None)
+                if tile is not None:
+                    self._forget(zoom, tile)
+
+    def _forget(self, zoom: float, tile: pg.Surface, /) -> None:
+        self.pixels -= tile.get_width() * tile.get_height()
+        self.zooms[zoom] -= 1
+        if not self.zooms[zoom]:
+            del self.zooms[zoom]
+
+    def _tile(self, zoom: float, tx: int, ty: int, counts: t.Callable[[], game.Counts], /) -> pg.Surface:
+        key = (zoom, tx, ty)
+        tile = self.tiles.get(key)
+        if tile is not None:
+            self.tiles.move_to_end(key)
+            return tile
+
+        b = self.renderer.board
+        n = self.cells(zoom)
+        pad = self.pad(zoom)
+        size = round(n * zoom) + 2 * pad
+        tile = pg.Surface((size, size), flags=pg.SRCALPHA)
+        local = _ShiftedView(zoom, Point(tx * n, ty * n), Point(pad, pad))
+        vis = Visible(tx * n, ty * n, min(b.x, (tx + 1) * n), min(b.y, (ty + 1) * n))
+        self.renderer.draw_layers(tile, local, vis, counts())
+
+        self.tiles[key] = tile
+        self.pixels += size * size
+        self.zooms[zoom] += 1
+        while self.pixels > TILE_CACHE_PIXELS and len(self.tiles) > 1:
+            (z, _, _), old = self.tiles.popitem(last=False)
+            self._forget(z, old)
+        return tile
+
+    def draw(self, target: pg.Surface, view: View, vis: Visible, /) -> None:
+        '''
+        blits the tiles of the visible cells, drawing the missing ones;
+        between mip levels the tiles of the level above are put together in a scratch surface
+        the size of target at that level and scaled down, so neither depends on the size of the board
+        '''
+        self.invalidate()
+        # counted once per frame, and only if a tile has to be drawn
+        counts: list[game.Counts] = []
+
+        def get_counts() -> game.Counts:
+            if not counts:
+                counts.append(self.renderer.board.counts())
+            return counts[0]
+
+        zoom = view.zoom_k
+        level = mip_level(zoom)
+        if level == zoom:
+            self._blit(target, view, vis, get_counts)
+            return
+
+        k = zoom / level
+        w, h = target.get_size()
+        size = (math.ceil(w / k), math.ceil(h / k))
+        if self.scratch.get_size() != size:
+            self.scratch = pg.Surface(size, flags=pg.SRCALPHA)
+            self.scaled = pg.Surface((round(size[0] * k), round(size[1] * k)), flags=pg.SRCALPHA)
+        self.scratch.fill((0, 0, 0, 0))
+        # the same logic point is at the origin of both
+        lview = View(level, view.pos)
+        self._blit(self.scratch, lview, visible(self.renderer.board, lview, Point.from_tuple(size)), get_counts)
+        pg.transform.smoothscale(self.scratch, self.scaled.get_size(), self.scaled)
+        target.blit(self.scaled, (0, 0))
+
+    def _blit(
+        self,
+        target: pg.Surface,
+        view: View,
+        vis: Visible,
+        counts: t.Callable[[], game.Counts],
+        /,
+    ) -> None:
+        if vis.x0 >= vis.x1 or vis.y0 >= vis.y1:
+            return
+        zoom = view.zoom_k
+        n = self.cells(zoom)
+        pad = self.pad(zoom)
+        for ty in range(vis.y0 // n, (vis.y1 - 1) // n + 1):
+            for tx in range(vis.x0 // n, (vis.x1 - 1) // n + 1):
+                tile = self._tile(zoom, tx, ty, counts)
+                x, y = pixel(view.map(Point(tx * n, ty * n)))
+                target.blit(tile, (x - pad, y - pad))
+
+
+def mip_level(zoom: float, /) -> int:
+    '''zoom tiles are drawn at: the power of two at or above zoom, so they are only ever scaled down'''
+    return 1 << max(0, math.ceil(math.log2(zoom)))
+
+
+class Glow:
+    '''
+    post-processing stage: a trail of the earlier frames, blurred and fading, lightens the frame;
+    it is kept at a fraction of the resolution in preallocated surfaces and updated only
+    around what changed in the last GLOW_FRAMES frames, the whole of it when the view moves;
+    it switches itself off when it is too slow, until the target changes size
+    '''
+
+    __slots__ = ('board', 'changes', 'size', 'scale', 'blur', 'trail', 'up', 'active', 'extent', 'key', 'slow', 'off')
+
+    def __init__(self, board: game.Board, /) -> None:
+        self.board = board
+        self.changes = board.subscribe()
+        self.size = (0, 0)
+        # target pixels per pixel of the glow, and the blur radii in pixels of the glow
+        self.scale = GLOW_SCALE
+        self.blur: tuple[int, ...] = ()
+        # the glow, and the glow scaled back to the resolution of the target
+        self.trail = pg.Surface((1, 1))
+        self.up = pg.Surface((1, 1))
+        # disjoint regions of trail still changing and the number of frames they still do
+        self.active: list[tuple[pg.Rect, int]] = []
+        # region of trail that has ever been lit
+        self.extent = pg.Rect(0, 0, 0, 0)
+        # zoom and position of the view of the last frame
+        self.key: tuple[float, Point] | None = None
+        self.slow = 0
+        self.off = False
+
+    def close(self) -> None:
+        self.board.unsubscribe(self.changes)
+
+    def _resize(self, target: pg.Surface, /) -> None:
+        self.size = target.get_size()
+        w, h = self.size
+        self.scale = max(GLOW_SCALE, math.ceil(math.sqrt(w * h / GLOW_PIXELS)))
+        # at least one pass, blurring also copies the region, which then is blitted back onto trail
+        self.blur = tuple(max(1, round(r / self.scale)) for r in GLOW_BLUR)
+        small = (-(-w // self.scale), -(-h // self.scale))
+        self.trail = pg.Surface(small, 0, target)
+        self.up = pg.Surface((small[0] * self.scale, small[1] * self.scale), 0, target)
+        self.active = []
+        self.extent = pg.Rect(0, 0, 0, 0)
+        self.key = None
+        self.slow = 0
+        self.off = False
+
+    def _changed(self, view: View, /) -> pg.Rect | None:
+        '''region of trail around the board changes since the last frame'''
+        ch = self.changes.drain()
+        if not ch:
+            return None
+        changed = ch.cells | ch.vertices | ch.edges_h | ch.edges_v
+        xs = [x for x, _ in changed]
+        ys = [y for _, y in changed]
+        # an element reaches into the cells around it
+        x0, y0 = (view.map(Point(min(xs) - 1, min(ys) - 1)) / self.scale).floor()
+        x1, y1 = (view.map(Point(max(xs) + 2, max(ys) + 2)) / self.scale).ceil()
+        return pg.Rect(x0, y0, x1 - x0, y1 - y0)
+
+    def _add(self, r: pg.Rect, frames: int, /) -> None:
+        '''makes the glow around r active, merged with the regions it touches, so no pixel is blurred twice a frame'''
+        r = r.inflate(2 * GLOW_SPREAD, 2 * GLOW_SPREAD).clip(self.trail.get_rect())
+        if not r:
+            return
+        i = r.collidelist([other for other, _ in self.active])
+        while i >= 0:
+            other, n = self.active.pop(i)
+            r = r.union(other)
+            frames = max(frames, n)
+            i = r.collidelist([other for other, _ in self.active])
+        self.active.append((r, frames))
+
+    def _step(self, target: pg.Surface, r: pg.Rect, /) -> None:
+        '''one frame of the glow in region r'''
+        k = self.scale
+        src = r.inflate(2 * sum(self.blur), 2 * sum(self.blur)).clip(self.trail.get_rect())
+        blurred = self.trail.subsurface(src)
+        for radius in self.blur:
+            blurred = pg.transform.box_blur(blurred, radius)
+        blurred.fill((GLOW_FADE,) * 3, special_flags=pg.BLEND_MULT)
+        self.trail.blit(blurred, r, r.move(-src.x, -src.y))
+
+        full = pg.Rect(r.x * k, r.y * k, r.w * k, r.h * k).clip(target.get_rect())
+        if full:
+            sharp = pg.transform.smoothscale(target.subsurface(full), (-(-full.w // k), -(-full.h // k)))
+            self.trail.blit(sharp, r, special_flags=pg.BLEND_MAX)
+        pg.transform.smoothscale(
+            self.trail.subsurface(r),
+            (r.w * k, r.h * k),
+            self.up.subsurface(r.x * k, r.y * k, r.w * k, r.h * k),
+        )
+        self.extent = self.extent.union(r) if self.extent else r
+
+    def apply(self, target: pg.Surface, view: View, /) -> None:
+        '''lightens target, the current frame, with the glow and adds the frame to it'''
+        start = time.perf_counter()
+        if target.get_size() != self.size:
+            self._resize(target)
+        if self.off:
+            self.changes.drain()
+            return
+
+        key = (view.zoom_k, view.pos)
+        if key != self.key:
+            self.key = key
+            self.changes.drain()
+            self._add(self.trail.get_rect(), GLOW_FRAMES)
+        else:
+            r = self._changed(view)
+            if r is not None:
+                self._add(r, GLOW_FRAMES)
+
+        for r, _ in self.active:
+            self._step(target, r)
+        self.active = [(r, n - 1) for r, n in self.active if n > 1]
+
+        if self.extent:
+            e, k = self.extent, self.scale
+            full = pg.Rect(e.x * k, e.y * k, e.w * k, e.h * k)
+            target.blit(self.up, full, full, special_flags=pg.BLEND_MAX)
+
+        if time.perf_counter() - start > GLOW_BUDGET:
+            self.slow += 1
+            self.off = self.slow >= GLOW_SLOW_FRAMES
+        else:
+            self.slow = 0
+
+
+def draw_hover(target: pg.Surface, view: View, hit: hittest.Hit, /) -> None:
+    '''marks the element under the mouse on top of a drawn frame'''
+    k = view.zoom_k / CELL_SIZE
+    width = max(1, round(LINE_THICKNESS * k))
+    shift = Point.p11 * k
+    p = view.map(Point(hit.x, hit.y))
+    match hit.kind:
+        case hittest.HIT_VERTEX:
+            pg.draw.circle(target, COLOR_HOVER, pixel(p), max(2, round(VERTEX_SIZE * k)), width=1)
+        case hittest.HIT_EDGE_H:
+            draw_line(target, COLOR_HOVER, p - shift, view.map(Point(hit.x + 1, hit.y)) - shift, width=width)
+        case hittest.HIT_EDGE_V:
+            draw_line(target, COLOR_HOVER, p - shift, view.map(Point(hit.x, hit.y + 1)) - shift, width=width)
+        case hittest.HIT_CELL:
+            x0, y0 = pixel(p)
+            x1, y1 = pixel(view.map(Point(hit.x + 1, hit.y + 1)))
+            pg.draw.rect(target, COLOR_HOVER, pg.Rect(x0, y0, x1 - x0, y1 - y0).inflate(-2 * width, -2 * width), width=1)
+
+
+def render(board: game.Board, /, zoom: float = CELL_SIZE, *, margin: int = 1) -> pg.Surface:
+    '''
+    image of the whole board with margin cells around it, zoom pixels per cell;
+    needs no window, only plain surfaces
+    '''
+    if not pg.font.get_init():
+        pg.font.init()
+    view = View(zoom, Point(-margin, -margin))
+    target = pg.Surface(view.map(Point(board.x + margin, board.y + margin)).round())
+    Renderer(board).draw(target, view, glow=False)
+    return target
+
+
+def save_png(board: game.Board, path: str | os.PathLike[str], /, zoom: float = CELL_SIZE, *, margin: int = 1) -> None:
+    pg.image.save(render(board, zoom, margin=margin), os.fspath(path))
@@ -0,0 +1,388 @@
+from __future__ import annotations
+import typing as t
+import dataclasses
+import functools
+import pathlib
+
+import game
+import reader
+
+RULES_PATH: t.Final = pathlib.Path(__file__).with_name('rules.sli')
+RULES_START: t.Final = '### START ###'
+RULES_END: t.Final = '### END ###'
+
+# pattern element: (kind, x, y, value)
+type _Kind = int
+KIND_NUM: t.Final[_Kind] = 0
+KIND_H: t.Final[_Kind] = 1
+KIND_V: t.Final[_Kind] = 2
+type _Elem = tuple[_Kind, int, int, int]
+# premise and conclusion of a rule as (offset, value) in a Grid
+type _FlatRule = tuple[tuple[tuple[int, int], ...], tuple[tuple[int, int], ...]]
+# rules with a premise element, grouped by position of another clue relative to it and by its value,
+# an entry is (rule, element x, element y); None stands for rules without another clue
+type _ElemGroups = dict[tuple[int, int] | None, dict[int | None, list[tuple[Rule, int, int]]]]
+# the same in a Grid of some stride: (offset of the other clue, flat rules by its value)
+type _FlatGroups = list[tuple[int | None, dict[int | None, list[_FlatRule]]]]
+
+# getters indexed by kind, all of them are safe to call outside of the board
+_GET: t.Final = (
+    game.Board._get_num,
+    game.Board._get_edge_h,
+    game.Board._get_edge_v,
+)
+_SET: t.Final = (
+    game.Board._set_num,
+    game.Board._set_edge_h,
+    game.Board._set_edge_v,
+)
+
+
+class Contradiction(Exception):
+    '''board state is inconsistent with the rules of the game'''
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Rule:
+    '''
+    compiled rule: if every premise element matches the board,
+    every conclusion element can be written to it
+    '''
+
+    w: int
+    h: int
+    premise: tuple[_Elem, ...]
+    conclusion: tuple[_Elem, ...]
+    # most selective premise element, used to find placements on a board
+    anchor: _Elem
+
+    def matches(self, board: game.Board, ox: int, oy: int, /) -> bool:
+        for kind, x, y, v in self.premise:
+            if _GET[kind](board, ox + x, oy + y) != v:
+                return False
+        return True
+
+    def deductions(self, board: game.Board, ox: int, oy: int, /) -> t.Iterator[_Elem]:
+        '''conclusions of a matched rule that are not on the board yet'''
+        for kind, x, y, v in self.conclusion:
+            cur = _GET[kind](board, ox + x, oy + y)
+            if cur == v:
+                continue
+            if cur != game.EDGE_UNK:
+                raise Contradiction(f'rule wants {v} at {(kind, ox + x, oy + y)}, got {cur}')
+            yield (kind, ox + x, oy + y, v)
+
+
+def _elements(b: game.Board, /) -> t.Iterator[_Elem]:
+    for y in range(b.y):
+        for x in range(b.x):
+            yield (KIND_NUM, x, y, b._get_num(x, y))
+    for y in range(b.y + 1):
+        for x in range(b.x):
+            yield (KIND_H, x, y, b._get_edge_h(x, y))
+    for y in range(b.y):
+        for x in range(b.x + 1):
+            yield (KIND_V, x, y, b._get_edge_v(x, y))
+
+
+def _anchor_key(e: _Elem, /) -> int:
+    kind, _, _, v = e
+    if kind == KIND_NUM:
+        return 0
+    if v == game.EDGE_1:
+        return 1
+    return 2
+
+
+# elements are transformed in doubled coordinates, where the kind of an element
+# is defined by parity: cells are (odd, odd), h-edges (odd, even), v-edges (even, odd)
+def _to_double(e: _Elem, /) -> tuple[int, int, int]:
+    kind, x, y, v = e
+    if kind == KIND_NUM:
+        return 2 * x + 1, 2 * y + 1, v
+    if kind == KIND_H:
+        return 2 * x + 1, 2 * y, v
+    return 2 * x, 2 * y + 1, v
+
+
+def _from_double(X: int, Y: int, v: int, /) -> _Elem:
+    if X % 2 and Y % 2:
+        return (KIND_NUM, X // 2, Y // 2, v)
+    if X % 2:
+        return (KIND_H, X // 2, Y // 2, v)
+    return (KIND_V, X // 2, Y // 2, v)
+
+
+class Grid:
+    '''
+    elements of a board in one flat list in doubled coordinates, with a margin around the board
+    where edges read as EDGE_0 and clues as NUM_UNK, same as the board getters outside of it;
+    rules are matched on it with precomputed index offsets instead of getter calls
+    '''
+
+    stride: int
+    # margin in doubled coordinates
+    pad: int
+    data: list[int]
+
+    def __init__(self, board: game.Board, margin: int, /) -> None:
+        self.pad = pad = 2 * margin + 2
+        self.stride = 2 * board.x + 1 + 2 * pad
+        rows = 2 * board.y + 1 + 2 * pad
+        self.data = [game.EDGE_0] * (self.stride * rows)
+        for Y in range(1 - pad % 2, rows, 2):
+            for X in range(1 - pad % 2, self.stride, 2):
+                self.data[Y * self.stride + X] = game.NUM_UNK
+        for e in _elements(board):
+            self.data[self.index(*e[:3])] = e[3]
+
+    def index(self, kind: _Kind, x: int, y: int, /) -> int:
+        X, Y, _ = _to_double((kind, x, y, 0))
+        return (Y + self.pad) * self.stride + X + self.pad
+
+
+def _make_rule(premise: t.Iterable[_Elem], conclusion: t.Iterable[_Elem], /) -> Rule:
+    '''normalized rule: elements are sorted and moved as close to (0, 0) as possible'''
+    pd = [_to_double(e) for e in premise]
+    cd = [_to_double(e) for e in conclusion]
+    # shift only by even amounts to keep the parity
+    dx = min(X for X, _, _ in pd + cd) // 2 * 2
+    dy = min(Y for _, Y, _ in pd + cd) // 2 * 2
+    prem = tuple(sorted(_from_double(X - dx, Y - dy, v) for X, Y, v in pd))
+    concl = tuple(sorted(_from_double(X - dx, Y - dy, v) for X, Y, v in cd))
+    w = (max(X for X, _, _ in pd + cd) - dx + 1) // 2
+    h = (max(Y for _, Y, _ in pd + cd) - dy + 1) // 2
+    return Rule(w, h, prem, concl, min(prem, key=_anchor_key))
+
+
+def _transform(r: Rule, rotations: int, mirror: bool, /) -> Rule:
+    def f(e: _Elem, /) -> _Elem:
+        X, Y, v = _to_double(e)
+        w, h = r.w, r.h
+        for _ in range(rotations):
+            X, Y = 2 * h - Y, X
+            w, h = h, w
+        if mirror:
+            X = 2 * w - X
+        return _from_double(X, Y, v)
+
+    return _make_rule(map(f, r.premise), map(f, r.conclusion))
+
+
+def variants(r: Rule, /) -> list[Rule]:
+    '''all distinct rotations and reflections of a rule'''
+    return [*dict.fromkeys(_transform(r, rot, mirror) for mirror in (False, True) for rot in range(4))]
+
+
+def compile_rule(lines: t.Sequence[str], first_line: int = 1, /) -> Rule:
+    '''rule drawn in the layout of rules.sli, lines are numbered from first_line in errors'''
+    before = reader.parse_art(lines, first_line)
+    after = reader.parse_art(lines, first_line, initial=False)
+
+    # NUM_UNK and EDGE_UNK are both "nothing known here"
+    premise = []
+    conclusion = []
+    for e1, e2 in zip(_elements(before), _elements(after)):
+        if e1[3] != game.EDGE_UNK:
+            premise.append(e1)
+        elif e2[3] != game.EDGE_UNK:
+            conclusion.append(e2)
+
+    if not premise:
+        raise reader.ParseError(first_line, 'rule has no premise')
+    if not conclusion:
+        raise reader.ParseError(first_line, 'rule has no conclusion')
+
+    return _make_rule(premise, conclusion)
+
+
+class RuleSet:
+    '''
+    rules indexed by (kind, value) of their anchor element,
+    so only rules that can match at a board position are tried there
+    '''
+
+    rules: list[Rule]
+    by_anchor: dict[tuple[_Kind, int], list[Rule]]
+    # every premise element of every rule, used to recheck only around changes;
+    # grouped by position (relative to the element) and value of another clue of the rule,
+    # so that one clue lookup rejects a whole group
+    by_elem: dict[tuple[_Kind, int], _ElemGroups]
+    # how far a rule can stick out of the board
+    margin: int
+
+    def __init__(self, rules: t.Iterable[Rule], /) -> None:
+        self.rules = list(rules)
+        self.by_anchor = {}
+        self.by_elem = {}
+        for r in self.rules:
+            kind, _, _, v = r.anchor
+            self.by_anchor.setdefault((kind, v), []).append(r)
+            for e in r.premise:
+                kind, x, y, v = e
+                other = next((n for n in r.premise if n[0] == KIND_NUM and n != e), None)
+                if other is None:
+                    off, n = None, None
+                else:
+                    off, n = (other[1] - x, other[2] - y), other[3]
+                groups = self.by_elem.setdefault((kind, v), {}).setdefault(off, {})
+                groups.setdefault(n, []).append((r, x, y))
+        self.margin = max((max(r.w, r.h) for r in self.rules), default=0)
+        # by_elem flattened for every Grid stride it was used with
+        self._flat: dict[int, dict[tuple[_Kind, int], _FlatGroups]] = {}
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def _positions(self, board: game.Board, kind: _Kind, v: int, /) -> t.Iterator[tuple[int, int]]:
+        # edges outside of the board read as EDGE_0, so rules anchored on
+        # an absent edge have to be tried around the board as well
+        m = self.margin
+        w = board.x + (kind == KIND_V)
+        h = board.y + (kind == KIND_H)
+        get = _GET[kind]
+        for y in range(-m, h + m):
+            for x in range(-m, w + m):
+                if get(board, x, y) == v:
+                    yield x, y
+
+    def deductions(self, board: game.Board, /) -> t.Iterator[_Elem]:
+        for (kind, v), rules in self.by_anchor.items():
+            for px, py in self._positions(board, kind, v):
+                for r in rules:
+                    _, ax, ay, _ = r.anchor
+                    ox = px - ax
+                    oy = py - ay
+                    if r.matches(board, ox, oy):
+                        yield from r.deductions(board, ox, oy)
+
+    def deductions_at(self, board: game.Board, kind: _Kind, x: int, y: int, /) -> t.Iterator[_Elem]:
+        '''deductions of rules that use the given element, as it is on the board now'''
+        v = _GET[kind](board, x, y)
+        for off, groups in self.by_elem.get((kind, v), {}).items():
+            n = None if off is None else board._get_num(x + off[0], y + off[1])
+            if n not in groups:
+                continue
+            for r, dx, dy in groups[n]:
+                ox = x - dx
+                oy = y - dy
+                if r.matches(board, ox, oy):
+                    yield from r.deductions(board, ox, oy)
+
+    def _flat_table(self, stride: int, /) -> dict[tuple[_Kind, int], _FlatGroups]:
+        '''by_elem with positions turned into offsets in a Grid with the given stride'''
+        table = self._flat.get(stride)
+        if table is None:
+            def off(kind: _Kind, x: int, y: int, /) -> int:
+                X, Y, _ = _to_double((kind, x, y, 0))
+                return Y * stride + X
+
+            table = self._flat[stride] = {}
+            for (kind, v), by_off in self.by_elem.items():
+                groups_list = table[(kind, v)] = []
+                for other, groups in by_off.items():
+                    o = None if other is None else off(KIND_NUM, *other) - off(kind, 0, 0)
+                    flat_groups: dict[int | None, list[_FlatRule]] = {}
+                    for n, group in groups.items():
+                        flat_groups[n] = [
+                            (
+                                tuple((off(k, x - dx, y - dy) - off(kind, 0, 0), pv) for k, x, y, pv in r.premise),
+                                tuple((off(k, x - dx, y - dy) - off(kind, 0, 0), cv) for k, x, y, cv in r.conclusion),
+                            )
+                            for r, dx, dy in group
+                        ]
+                    groups_list.append((o, flat_groups))
+        return table
+
+    def deductions_grid(self, grid: Grid, kind: _Kind, i: int, /) -> t.Iterator[tuple[int, int]]:
+        '''same as deductions_at, on a grid: yields (grid index, value)'''
+        data = grid.data
+        for o, groups in self._flat_table(grid.stride).get((kind, data[i]), ()):
+            group = groups.get(None if o is None else data[i + o])
+            if group is None:
+                continue
+            for premise, conclusion in group:
+                for po, pv in premise:
+                    if data[i + po] != pv:
+                        break
+                else:
+                    for co, cv in conclusion:
+                        cur = data[i + co]
+                        if cur == cv:
+                            continue
+                        if cur != game.EDGE_UNK:
+                            raise Contradiction(f'rule wants {cv} at grid index {i + co}, got {cur}')
+                        yield i + co, cv
+
+    def deductions_for(self, board: game.Board, changes: game.Changes, /) -> t.Iterator[_Elem]:
+        for x, y in changes.cells:
+            yield from self.deductions_at(board, KIND_NUM, x, y)
+        for x, y in changes.edges_h:
+            yield from self.deductions_at(board, KIND_H, x, y)
+        for x, y in changes.edges_v:
+            yield from self.deductions_at(board, KIND_V, x, y)
+
+    def apply(self, board: game.Board, changes: game.Changes | None = None, /) -> int:
+        '''
+        applies rules until nothing changes, returns number of edges set
+        if changes are given, the board is assumed to be already saturated except for them
+        '''
+        total = 0
+        ch = board.subscribe()
+        try:
+            if changes is None:
+                found = list(self.deductions(board))
+            else:
+                found = list(self.deductions_for(board, changes))
+            while found:
+                for kind, x, y, v in found:
+                    cur = _GET[kind](board, x, y)
+                    if cur == v:
+                        continue
+                    if cur != game.EDGE_UNK:
+                        raise Contradiction(f'rules disagree at {(kind, x, y)}')
+                    _SET[kind](board, x, y, v)
+                    total += 1
+                found = list(self.deductions_for(board, ch.drain()))
+        finally:
+            board.unsubscribe(ch)
+        return total
+
+
+def read_rules(f: t.Iterable[str], /) -> t.Iterator[tuple[int, list[str]]]:
+    '''
+    rule sources between the START and END markers with the numbers of their first lines,
+    commented out rules are skipped; without a START marker everything before END is read
+    '''
+    # rules before START are only yielded if it never comes
+    head: list[tuple[int, list[str]]] | None = []
+    for start, lines in reader.blocks(f):
+        marks = [line.strip() for line in lines]
+        if RULES_START in marks:
+            i = marks.index(RULES_START) + 1
+            head = None
+            start, lines, marks = start + i, lines[i:], marks[i:]
+        end = RULES_END in marks
+        if end:
+            lines = lines[: marks.index(RULES_END)]
+        if not all(not m or m.startswith('#') for m in marks[: len(lines)]):
+            if head is None:
+                yield start, lines
+            else:
+                head.append((start, lines))
+        if end:
+            break
+    yield from head or ()
+
+
+@functools.cache
+def load_rules(path: str | pathlib.Path = RULES_PATH, /) -> RuleSet:
+    '''
+    compiles every rule together with all its rotations and reflections,
+    equal variants (including ones coming from different rules) are stored once
+    '''
+    rules: dict[Rule, None] = {}
+    with open(path) as f:
+        for start, lines in read_rules(f):
+            rules.update(dict.fromkeys(variants(compile_rule(lines, start))))
+    return RuleSet(rules)
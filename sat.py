@@ -0,0 +1,513 @@
+from __future__ import annotations
+import typing as t
+import heapq
+import itertools
+import os
+import subprocess
+import tempfile
+import time
+
+import game
+import solver
+from rules import Contradiction
+
+
+class Cnf:
+    '''clauses in DIMACS convention: variables are 1..nvars, a negative literal is a negation'''
+
+    nvars: int
+    clauses: list[list[int]]
+
+    def __init__(self, nvars: int = 0, /) -> None:
+        self.nvars = nvars
+        self.clauses = []
+
+    def add(self, clause: t.Iterable[int], /) -> None:
+        self.clauses.append(list(clause))
+
+    def write_dimacs(self, f: t.TextIO, /) -> None:
+        f.write(f'p cnf {self.nvars} {len(self.clauses)}\n')
+        for c in self.clauses:
+            f.write(' '.join(map(str, c)))
+            f.write(' 0\n')
+
+
+def _forbid_counts(cnf: Cnf, vs: t.Sequence[int], bad: t.Container[int], guard: int = 0, /) -> None:
+    '''forbids every assignment of vs with a number of true variables in bad (only if guard is true)'''
+    head = [-guard] if guard else []
+    for bits in itertools.product((False, True), repeat=len(vs)):
+        if sum(bits) in bad:
+            cnf.add(head + [-v if b else v for v, b in zip(vs, bits)])
+
+
+class Encoding:
+    '''
+    board as CNF: variable e + 1 is "edge e is a line", edges numbered as in solver.Solver,
+    then variable ne + c + 1 is "cell c is inside of the loop", a line separates inside from outside
+    the single loop rule is not encoded up front, see cut_cycles
+
+    with guarded clues every clue gets a selector variable that switches it on,
+    so puzzles differing only in clues can be solved with one CNF by assuming selectors
+    '''
+
+    cnf: Cnf
+    topo: solver.Solver
+    # clue cell -> selector variable, empty unless clues are guarded
+    selectors: dict[int, int]
+    lines: list[int]
+
+    def __init__(self, board: game.Board, /, *, guarded: bool = False) -> None:
+        # solver tables give the topology, and its propagation fixes the easy edges
+        self.topo = topo = solver.Solver(board)
+        if not guarded:
+            topo.propagate()
+
+        ne = len(topo.state)
+        self.cnf = cnf = Cnf(ne + len(topo.clues))
+        self.selectors = {}
+        # lines given or fixed by propagation, the loop has to go through all of them
+        self.lines = [e for e, s in enumerate(topo.state) if s == game.EDGE_1]
+        for e, s in enumerate(topo.state):
+            if s != game.EDGE_UNK:
+                cnf.add([e + 1 if s == game.EDGE_1 else -(e + 1)])
+        for c, n in enumerate(topo.clues):
+            if n >= 0:
+                guard = 0
+                if guarded:
+                    cnf.nvars += 1
+                    guard = self.selectors[c] = cnf.nvars
+                _forbid_counts(cnf, [e + 1 for e in topo.cell_edges[c]], {*range(5)} - {n}, guard)
+        for es in topo.vtx_edges:
+            _forbid_counts(cnf, [e + 1 for e in es], {1, 3, 4})
+        outside = len(topo.clues)
+        for e, (a, b) in enumerate(topo.edge_sides):
+            va = ne + a + 1
+            if b == outside:
+                cnf.add([-(e + 1), va])
+                cnf.add([e + 1, -va])
+            else:
+                vb = ne + b + 1
+                cnf.add([-(e + 1), va, vb])
+                cnf.add([-(e + 1), -va, -vb])
+                cnf.add([e + 1, -va, vb])
+                cnf.add([e + 1, va, -vb])
+        # an empty board is not a loop
+        cnf.add(range(1, ne + 1))
+
+    def cell_var(self, c: int, /) -> int:
+        return len(self.topo.state) + c + 1
+
+    def decode(self, model: t.Sequence[bool], /) -> game.Board:
+        '''board with clues and edge states of a model (indexed by variable)'''
+        b = self.topo.board.copy()
+        nh = self.topo.nh
+        for e in range(len(self.topo.state)):
+            v = game.EDGE_1 if model[e + 1] else game.EDGE_0
+            if e < nh:
+                b.data_h[e] = v
+            else:
+                b.data_v[e - nh] = v
+        return b
+
+    def cycles(self, model: t.Sequence[bool], /) -> list[list[int]]:
+        '''edges of every loop of a model'''
+        topo = self.topo
+        seen = bytearray(len(topo.state))
+        res = []
+        for e0 in range(len(topo.state)):
+            if not model[e0 + 1] or seen[e0]:
+                continue
+            cycle = []
+            stack = [e0]
+            seen[e0] = 1
+            while stack:
+                e = stack.pop()
+                cycle.append(e)
+                for u in topo.edge_vtx[e]:
+                    for f in topo.vtx_edges[u]:
+                        if model[f + 1] and not seen[f]:
+                            seen[f] = 1
+                            stack.append(f)
+            res.append(cycle)
+        return res
+
+    def _violated(self, cycle: t.Collection[int], model: t.Sequence[bool], /) -> int:
+        '''a clue that is on in the model and not satisfied by the loop alone, or -1'''
+        topo = self.topo
+        lines = set(cycle)
+        for c, n in enumerate(topo.clues):
+            if n < 0 or (self.selectors and not model[self.selectors[c]]):
+                continue
+            if sum(e in lines for e in topo.cell_edges[c]) != n:
+                return c
+        return -1
+
+    def _has_lines(self, cycle: t.Collection[int], /) -> bool:
+        '''the loop goes through every known line'''
+        edges = set(cycle)
+        return all(e in edges for e in self.lines)
+
+    def cut_cycles(self, model: t.Sequence[bool], /) -> list[int] | None:
+        '''
+        adds a clause against every loop of a model with several loops;
+        a loop can be the whole solution only if it satisfies all clues alone
+        and goes through every known line, so such a loop is returned as the answer instead
+        with guarded clues a cut holds only while the clue it violates is on,
+        a cut for a missed known line always holds
+        '''
+        cycles = self.cycles(model)
+        if len(cycles) <= 1:
+            return cycles[0] if cycles else None
+        for cycle in cycles:
+            c = self._violated(cycle, model)
+            if c < 0 and self._has_lines(cycle):
+                return cycle
+            head = [-self.selectors[c]] if self.selectors and c >= 0 else []
+            self.cnf.add(head + [-(e + 1) for e in cycle])
+        return None
+
+
+class CdclSolver:
+    '''
+    small conflict driven clause learning solver:
+    two watched literals, first UIP learning, VSIDS with phase saving, Luby restarts
+
+    clauses can be added between calls to solve;
+    literal codes are 2 * var for var and 2 * var + 1 for its negation
+    '''
+
+    def __init__(self, nvars: int = 0, /) -> None:
+        self.nvars = 0
+        self.ok = True
+        self.conflicts = 0
+        self.clauses: list[list[int]] = []
+        self.watches: list[list[int]] = [[], []]
+        # per literal code: 1 true, 0 false, -1 unassigned
+        self.val: list[int] = [-1, -1]
+        self.level: list[int] = [0]
+        self.reason: list[int] = [-1]
+        self.activity: list[float] = [0.0]
+        self.phase: list[int] = [1]
+        self.trail: list[int] = []
+        self.trail_lim: list[int] = []
+        self.qhead = 0
+        self.heap: list[tuple[float, int]] = []
+        self.inc = 1.0
+        self.reserve(nvars)
+
+    def reserve(self, nvars: int, /) -> None:
+        for v in range(self.nvars + 1, nvars + 1):
+            self.watches += [[], []]
+            self.val += [-1, -1]
+            self.level.append(0)
+            self.reason.append(-1)
+            self.activity.append(0.0)
+            # start with "no line", most edges end up like that
+            self.phase.append(2 * v + 1)
+            heapq.heappush(self.heap, (0.0, v))
+        self.nvars = max(self.nvars, nvars)
+
+    def suggest(self, lit: int, /) -> None:
+        '''value to try first for the variable, until search assigns it otherwise'''
+        self.reserve(abs(lit))
+        self.phase[abs(lit)] = 2 * lit if lit > 0 else -2 * lit + 1
+
+    def add_clause(self, clause: t.Iterable[int], /) -> None:
+        if not self.ok:
+            return
+        self._cancel(0)
+        codes: list[int] = []
+        for lit in clause:
+            self.reserve(abs(lit))
+            p = 2 * lit if lit > 0 else -2 * lit + 1
+            if self.val[p] == 1 or p ^ 1 in codes:
+                return  # satisfied at level 0 or tautology
+            if self.val[p] == -1 and p not in codes:
+                codes.append(p)
+        if not codes:
+            self.ok = False
+        elif len(codes) == 1:
+            self._enqueue(codes[0], -1)
+            self.ok = self._propagate() < 0
+        else:
+            self.clauses.append(codes)
+            self.watches[codes[0]].append(len(self.clauses) - 1)
+            self.watches[codes[1]].append(len(self.clauses) - 1)
+
+    def _enqueue(self, p: int, reason: int, /) -> None:
+        self.val[p] = 1
+        self.val[p ^ 1] = 0
+        self.level[p >> 1] = len(self.trail_lim)
+        self.reason[p >> 1] = reason
+        self.trail.append(p)
+
+    def _cancel(self, lvl: int, /) -> None:
+        if len(self.trail_lim) <= lvl:
+            return
+        val = self.val
+        start = self.trail_lim[lvl]
+        for p in self.trail[start:]:
+            v = p >> 1
+            val[p] = val[p ^ 1] = -1
+            self.phase[v] = p
+            heapq.heappush(self.heap, (-self.activity[v], v))
+        del self.trail[start:]
+        del self.trail_lim[lvl:]
+        self.qhead = start
+
+    def _propagate(self) -> int:
+        '''index of a conflicting clause or -1'''
+        val = self.val
+        clauses = self.clauses
+        watches = self.watches
+        trail = self.trail
+        while self.qhead < len(trail):
+            fl = trail[self.qhead] ^ 1
+            self.qhead += 1
+            ws = watches[fl]
+            i = j = 0
+            n = len(ws)
+            while i < n:
+                ci = ws[i]
+                i += 1
+                c = clauses[ci]
+                if c[0] == fl:
+                    c[0], c[1] = c[1], fl
+                first = c[0]
+                if val[first] == 1:
+                    ws[j] = ci
+                    j += 1
+                    continue
+                for k in range(2, len(c)):
+                    if val[c[k]] != 0:
+                        c[1], c[k] = c[k], fl
+                        watches[c[1]].append(ci)
+                        break
+                else:
+                    ws[j] = ci
+                    j += 1
+                    if val[first] == 0:
+                        while i < n:
+                            ws[j] = ws[i]
+                            j += 1
+                            i += 1
+                        del ws[j:]
+                        self.qhead = len(trail)
+                        return ci
+                    self._enqueue(first, ci)
+            del ws[j:]
+        return -1
+
+    def _bump(self, v: int, /) -> None:
+        self.activity[v] += self.inc
+        if self.activity[v] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.inc *= 1e-100
+            self.heap = [(-a, u) for u, a in enumerate(self.activity) if u and self.val[2 * u] == -1]
+            heapq.heapify(self.heap)
+        elif self.val[2 * v] == -1:
+            heapq.heappush(self.heap, (-self.activity[v], v))
+
+    def _analyze(self, confl: int, /) -> tuple[list[int], int]:
+        '''learnt clause (asserting literal first) and the level to jump back to'''
+        level = self.level
+        seen = bytearray(self.nvars + 1)
+        cur = len(self.trail_lim)
+        learnt = [-1]
+        counter = 0
+        p = -1
+        idx = len(self.trail) - 1
+        c = self.clauses[confl]
+        while True:
+            for q in c if p < 0 else c[1:]:
+                v = q >> 1
+                if not seen[v] and level[v] > 0:
+                    seen[v] = 1
+                    self._bump(v)
+                    if level[v] >= cur:
+                        counter += 1
+                    else:
+                        learnt.append(q)
+            while not seen[self.trail[idx] >> 1]:
+                idx -= 1
+            p = self.trail[idx]
+            idx -= 1
+            counter -= 1
+            if not counter:
+                break
+            c = self.clauses[self.reason[p >> 1]]
+        learnt[0] = p ^ 1
+
+        if len(learnt) == 1:
+            return learnt, 0
+        k = max(range(1, len(learnt)), key=lambda i: level[learnt[i] >> 1])
+        learnt[1], learnt[k] = learnt[k], learnt[1]
+        return learnt, level[learnt[1] >> 1]
+
+    def _decide(self) -> int:
+        '''literal code to assign next, or -1 if everything is assigned'''
+        while self.heap:
+            _, v = heapq.heappop(self.heap)
+            if self.val[2 * v] == -1:
+                return self.phase[v]
+        return -1
+
+    def solve(
+        self, assumptions: t.Sequence[int] = (), /, max_conflicts: int | None = None, deadline: float | None = None
+    ) -> bool:
+        '''
+        finds a model, assumptions are literals that have to hold in this call only;
+        a False result under assumptions does not make later calls fail
+        raises SearchLimit after max_conflicts conflicts, or at a conflict once time.monotonic() passes the deadline
+        '''
+        if not self.ok:
+            return False
+        start = self.conflicts
+        self.reserve(max(map(abs, assumptions), default=0))
+        assumed = [2 * lit if lit > 0 else -2 * lit + 1 for lit in assumptions]
+        self._cancel(0)
+        if self._propagate() >= 0:
+            self.ok = False
+            return False
+
+        for restart in itertools.count(1):
+            budget = 100 * _luby(restart)
+            while True:
+                confl = self._propagate()
+                if confl >= 0:
+                    self.conflicts += 1
+                    budget -= 1
+                    if max_conflicts is not None and self.conflicts - start > max_conflicts:
+                        self._cancel(0)
+                        raise solver.SearchLimit(f'no answer after {max_conflicts} conflicts')
+                    if deadline is not None and time.monotonic() > deadline:
+                        self._cancel(0)
+                        raise solver.SearchLimit(f'no answer in time after {self.conflicts - start} conflicts')
+                    if not self.trail_lim:
+                        self.ok = False
+                        return False
+                    if assumed and len(self.trail_lim) == 1:
+                        return False
+                    learnt, lvl = self._analyze(confl)
+                    self._cancel(lvl)
+                    if len(learnt) == 1:
+                        self._enqueue(learnt[0], -1)
+                    else:
+                        self.clauses.append(learnt)
+                        self.watches[learnt[0]].append(len(self.clauses) - 1)
+                        self.watches[learnt[1]].append(len(self.clauses) - 1)
+                        self._enqueue(learnt[0], len(self.clauses) - 1)
+                    self.inc /= 0.95
+                elif budget <= 0:
+                    self._cancel(0)
+                    break
+                elif assumed and not self.trail_lim:
+                    # all assumptions are decided first, together on level 1
+                    self.trail_lim.append(len(self.trail))
+                    for p in assumed:
+                        if self.val[p] == 0:
+                            return False
+                        if self.val[p] < 0:
+                            self._enqueue(p, -1)
+                else:
+                    p = self._decide()
+                    if p < 0:
+                        return True
+                    self.trail_lim.append(len(self.trail))
+                    self._enqueue(p, -1)
+        raise AssertionError('unreachable')
+
+    def model(self) -> list[bool]:
+        '''value of every variable after a successful solve, indexed by variable'''
+        return [False] + [self.val[2 * v] == 1 for v in range(1, self.nvars + 1)]
+
+
+def _luby(i: int, /) -> int:
+    '''i-th element (from 1) of 1 1 2 1 1 2 4 1 1 2 ...'''
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while True:
+        if i == (1 << k) - 1:
+            return 1 << (k - 1)
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+
+
+def run_external(cnf: Cnf, cmd: t.Sequence[str], /) -> list[bool] | None:
+    '''
+    solves with a solver binary that takes a DIMACS file as its last argument
+    and prints the result in SAT competition format ("s ..." and "v ..." lines)
+    '''
+    fd, path = tempfile.mkstemp(suffix='.cnf')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            cnf.write_dimacs(f)
+        out = subprocess.run([*cmd, path], capture_output=True, text=True).stdout
+    finally:
+        os.unlink(path)
+
+    model = [False] * (cnf.nvars + 1)
+    status = None
+    for line in out.splitlines():
+        if line.startswith('s '):
+            status = line[2:].strip()
+        elif line.startswith('v '):
+            for lit in map(int, line[2:].split()):
+                if lit > 0:
+                    model[lit] = True
+    if status == 'SATISFIABLE':
+        return model
+    if status == 'UNSATISFIABLE':
+        return None
+    raise RuntimeError(f'unexpected output of {cmd[0]}:\n{out}')
+
+
+def solve(
+    board: game.Board,
+    /,
+    cmd: t.Sequence[str] | None = None,
+    *,
+    other_than: game.Board | None = None,
+    deadline: float | None = None,
+) -> game.Board | None:
+    '''
+    solved copy of the board, or None if there is no solution
+    uses the bundled solver, or an external one if cmd is given;
+    loops are cut lazily, one round of solving per set of cuts
+    other_than is a solution that is not looked for, so a second solution shows the first one is not unique
+    the bundled solver raises SearchLimit once time.monotonic() passes the deadline
+    '''
+    try:
+        enc = Encoding(board)
+    except Contradiction:
+        return None
+    if other_than is not None:
+        # a single loop through all lines of another one is the same loop
+        lines = [*other_than.data_h, *other_than.data_v]
+        enc.cnf.add(-(e + 1) for e, v in enumerate(lines) if v == game.EDGE_1)
+
+    if cmd is None:
+        s = CdclSolver(enc.cnf.nvars)
+        for c in enc.cnf.clauses:
+            s.add_clause(c)
+    added = len(enc.cnf.clauses)
+
+    while True:
+        if cmd is None:
+            model = s.model() if s.solve(deadline=deadline) else None
+        else:
+            model = run_external(enc.cnf, cmd)
+        if model is None:
+            return None
+
+        loop = enc.cut_cycles(model)
+        if loop is not None:
+            on = set(loop)
+            return enc.decode([False] + [e in on for e in range(enc.cnf.nvars)])
+        if cmd is None:
+            for c in enc.cnf.clauses[added:]:
+                s.add_clause(c)
+        added = len(enc.cnf.clauses)
@@ -0,0 +1,623 @@
+from __future__ import annotations
+import typing as t
+import array
+import dataclasses
+import itertools
+import time
+
+import game
+import rules
+from rules import Contradiction
+
+COLOR_UNK: t.Final = 0
+COLOR_OUT: t.Final = 1
+COLOR_IN: t.Final = 2
+
+
+class SearchLimit(Exception):
+    '''search gave up before finding the answer'''
+
+
+class Solver:
+    '''
+    backtracking search over the edges of a board
+
+    edges are numbered h-edges first (y * x + x, same as Board.data_h),
+    then v-edges (same as Board.data_v), vertices are y * (x + 1) + x, cells are y * x + x
+    every change of the search state goes to the trail, so a branch is undone by unwinding it
+
+    besides the clue and vertex counts, cells are coloured inside / outside of the loop
+    (a line flips the colour, a cross keeps it), and the lines must stay connectable
+    the search probes before every decision: each unknown edge is tried both ways, a value that fails is ruled out
+    '''
+
+    board: game.Board
+    ruleset: rules.RuleSet | None
+    nodes: int
+    probes: int
+
+    def __init__(self, board: game.Board, ruleset: rules.RuleSet | None = None, /) -> None:
+        X, Y = board.x, board.y
+        nh = X * (Y + 1)
+        nv = (X + 1) * Y
+        self.nh = nh
+        self.ruleset = ruleset
+        self.nodes = 0
+        self.probes = 0
+        # edge to branch on next that probing found, -1 to choose it by _choose
+        self.branch = -1
+
+        # clues only, edge states are in state and in the grid
+        self.board = game.Board(X, Y)
+        self.board.data_num = board.data_num[:]
+        self.clues = board.data_num.tolist()
+        # the grid mirrors the edge states, so that rules can be matched on it
+        self.grid = rules.Grid(self.board, ruleset.margin if ruleset is not None else 0)
+
+        self.edge_pos: list[tuple[int, int, int]] = []  # (rules kind, x, y)
+        self.edge_vtx: list[tuple[int, int]] = []
+        self.edge_cells: list[tuple[int, ...]] = []
+        for y in range(Y + 1):
+            for x in range(X):
+                self.edge_pos.append((rules.KIND_H, x, y))
+                self.edge_vtx.append((y * (X + 1) + x, y * (X + 1) + x + 1))
+                self.edge_cells.append(tuple(c * X + x for c in (y - 1, y) if 0 <= c < Y))
+        for y in range(Y):
+            for x in range(X + 1):
+                self.edge_pos.append((rules.KIND_V, x, y))
+                self.edge_vtx.append((y * (X + 1) + x, (y + 1) * (X + 1) + x))
+                self.edge_cells.append(tuple(y * X + c for c in (x - 1, x) if 0 <= c < X))
+
+        self.edge_grid: list[int] = [self.grid.index(*pos) for pos in self.edge_pos]
+        self.grid_edge: dict[int, int] = {i: e for e, i in enumerate(self.edge_grid)}
+        self.cell_grid: list[int] = [self.grid.index(rules.KIND_NUM, x, y) for y in range(Y) for x in range(X)]
+
+        self.cell_edges: list[tuple[int, int, int, int]] = [
+            (y * X + x, (y + 1) * X + x, nh + y * (X + 1) + x, nh + y * (X + 1) + x + 1)
+            for y in range(Y)
+            for x in range(X)
+        ]
+        # cells on both sides of every edge, X * Y stands for everything outside of the board
+        self.edge_sides: list[tuple[int, int]] = [
+            (cs[0], X * Y) if len(cs) == 1 else (cs[0], cs[1]) for cs in self.edge_cells
+        ]
+        # the other edges of the cells beside every edge, each a way around it
+        self.edge_around: list[tuple[tuple[int, ...], ...]] = [
+            tuple(tuple(f for f in self.cell_edges[c] if f != e) for c in cs) for e, cs in enumerate(self.edge_cells)
+        ]
+        self.vtx_edges: list[list[int]] = [[] for _ in range((X + 1) * (Y + 1))]
+        for e, (a, b) in enumerate(self.edge_vtx):
+            self.vtx_edges[a].append(e)
+            self.vtx_edges[b].append(e)
+        # the same edges together with the vertices at their other ends
+        self.vtx_adj: list[list[tuple[int, int]]] = [[] for _ in self.vtx_edges]
+        for e, (a, b) in enumerate(self.edge_vtx):
+            self.vtx_adj[a].append((e, b))
+            self.vtx_adj[b].append((e, a))
+
+        self.state: list[int] = [game.EDGE_UNK] * (nh + nv)
+        self.cell_lines: list[int] = [0] * (X * Y)
+        self.cell_unk: list[int] = [4] * (X * Y)
+        self.vtx_lines: list[int] = [0] * len(self.vtx_edges)
+        self.vtx_unk: list[int] = [len(es) for es in self.vtx_edges]
+        # for an end of a path: the other end and the number of edges in the path
+        self.mate: list[int] = [-1] * len(self.vtx_edges)
+        self.plen: list[int] = [0] * len(self.vtx_edges)
+        # [number of lines, 1 if the loop is closed, an end of the path extended last]
+        self.glob: list[int] = [0, 0, -1]
+        # every cell is either inside or outside of the loop, lines separate them
+        self.color: list[int] = [COLOR_UNK] * (X * Y) + [COLOR_OUT]
+        self.last_end = -1
+        # the last connectivity check that went through the whole board:
+        # [trail length after it, vertices it reached, clue_epoch it was made with]
+        self.conn: list[t.Any] = [0, None, 0]
+        # bumped by set_clue, which is not on the trail
+        self.clue_epoch = 0
+
+        self.trail: list[tuple[list[t.Any] | array.array[int], int, t.Any]] = []
+        self.queue: list[int] = []
+        self.cqueue: list[int] = []
+        self.changed: list[int] = []
+        self.changed_clues: list[int] = []
+
+        for e, v in enumerate([*board.data_h, *board.data_v]):
+            if v != game.EDGE_UNK:
+                self.set(e, v)
+        # state with only the given edges, reset goes back to it
+        self.root = len(self.trail)
+        for c, n in enumerate(self.clues):
+            if n >= 0:
+                self.queue_clue(c)
+
+    def queue_clue(self, c: int, /) -> None:
+        '''every clue has to be looked at once, even if no edge around it gets set'''
+        self.queue.append(self.cell_edges[c][0])
+        self.changed_clues.append(c)
+
+    def reset(self) -> None:
+        '''goes back to the given edges, with everything queued for propagation'''
+        self.undo(self.root)
+        known = [e for e, s in enumerate(self.state) if s != game.EDGE_UNK]
+        self.queue.extend(known)
+        self.changed.extend(known)
+        for c, n in enumerate(self.clues):
+            if n >= 0:
+                self.queue_clue(c)
+
+    def set_clue(self, c: int, n: int, /) -> None:
+        '''
+        changes a clue, so puzzles differing in clues can share the tables;
+        it takes effect on reset, a new clue can also be queued on a state that holds without it
+        '''
+        self.clues[c] = n
+        self.clue_epoch += 1
+        self.board.data_num[c] = n
+        self.grid.data[self.cell_grid[c]] = n
+
+    # state changes
+
+    def _write(self, arr: list[t.Any] | array.array[int], i: int, v: t.Any, /) -> None:
+        self.trail.append((arr, i, arr[i]))
+        arr[i] = v
+
+    def undo(self, mark: int, /) -> None:
+        trail = self.trail
+        while len(trail) > mark:
+            arr, i, v = trail.pop()
+            arr[i] = v
+        self.queue.clear()
+        self.cqueue.clear()
+        self.changed.clear()
+        self.changed_clues.clear()
+
+    def set_color(self, c: int, col: int, /) -> None:
+        cur = self.color[c]
+        if cur == col:
+            return
+        if cur != COLOR_UNK:
+            raise Contradiction(f'cell {c} is both inside and outside')
+        self._write(self.color, c, col)
+        self.cqueue.append(c)
+
+    def set(self, e: int, v: int, /) -> None:
+        s = self.state[e]
+        if s == v:
+            return
+        if s != game.EDGE_UNK:
+            raise Contradiction(f'edge {self.edge_pos[e]} is already {s}')
+
+        w = self._write
+        w(self.state, e, v)
+        w(self.grid.data, self.edge_grid[e], v)
+        for c in self.edge_cells[e]:
+            w(self.cell_unk, c, self.cell_unk[c] - 1)
+            if v == game.EDGE_1:
+                w(self.cell_lines, c, self.cell_lines[c] + 1)
+        for u in self.edge_vtx[e]:
+            w(self.vtx_unk, u, self.vtx_unk[u] - 1)
+        if v == game.EDGE_1:
+            self._link(e)
+        self.queue.append(e)
+        self.changed.append(e)
+
+    def _link(self, e: int, /) -> None:
+        '''adds a line to path ends bookkeeping, detects loops'''
+        w = self._write
+        a, b = self.edge_vtx[e]
+        da = self.vtx_lines[a]
+        db = self.vtx_lines[b]
+        if da >= 2 or db >= 2:
+            raise Contradiction('branching line')
+        w(self.vtx_lines, a, da + 1)
+        w(self.vtx_lines, b, db + 1)
+        nlines = self.glob[0] + 1
+        w(self.glob, 0, nlines)
+
+        if da == 1 and self.mate[a] == b:
+            # closing a loop, it has to be the only one
+            if self.plen[a] + 1 != nlines:
+                raise Contradiction('more than one loop')
+            w(self.glob, 1, 1)
+            for f, s in enumerate(self.state):
+                if s == game.EDGE_UNK:
+                    self.set(f, game.EDGE_0)
+            return
+
+        if not da and not db:
+            # a new path: if all other lines were a single path, it can not be closed anymore
+            q = self.glob[2]
+            if q >= 0 and self.plen[q] == nlines - 1:
+                self._cross_between(q, self.mate[q])
+
+        end_a, len_a = (self.mate[a], self.plen[a]) if da == 1 else (a, 0)
+        end_b, len_b = (self.mate[b], self.plen[b]) if db == 1 else (b, 0)
+        if da == 1:
+            w(self.mate, a, -1)
+        if db == 1:
+            w(self.mate, b, -1)
+        n = len_a + len_b + 1
+        w(self.mate, end_a, end_b)
+        w(self.mate, end_b, end_a)
+        w(self.plen, end_a, n)
+        w(self.plen, end_b, n)
+        w(self.glob, 2, end_a)
+        self.last_end = end_a
+
+        # joining the ends of the path would close a loop while other lines exist
+        if n < nlines:
+            self._cross_between(end_a, end_b)
+
+    def _cross_between(self, u: int, v: int, /) -> None:
+        for f in self.vtx_edges[u]:
+            if v in self.edge_vtx[f] and self.state[f] == game.EDGE_UNK:
+                self.set(f, game.EDGE_0)
+
+    # propagation
+
+    def _check_cell(self, c: int, /) -> None:
+        n = self.clues[c]
+        if n < 0:
+            return
+        lines = self.cell_lines[c]
+        unk = self.cell_unk[c]
+        if lines > n or lines + unk < n:
+            raise Contradiction(f'clue {n} at cell {c}')
+        if not unk:
+            return
+        if lines == n:
+            v = game.EDGE_0
+        elif lines + unk == n:
+            v = game.EDGE_1
+        else:
+            return
+        for e in self.cell_edges[c]:
+            if self.state[e] == game.EDGE_UNK:
+                self.set(e, v)
+
+    def _check_vtx(self, u: int, /) -> None:
+        lines = self.vtx_lines[u]
+        unk = self.vtx_unk[u]
+        if lines == 1 and not unk:
+            raise Contradiction(f'dead end at vertex {u}')
+        if not unk:
+            return
+        if lines == 2 or (lines == 0 and unk == 1):
+            v = game.EDGE_0
+        elif lines == 1 and unk == 1:
+            v = game.EDGE_1
+        else:
+            return
+        for e in self.vtx_edges[u]:
+            if self.state[e] == game.EDGE_UNK:
+                self.set(e, v)
+
+    def _check_sides(self, e: int, /) -> None:
+        a, b = self.edge_sides[e]
+        ca = self.color[a]
+        cb = self.color[b]
+        s = self.state[e]
+        if s == game.EDGE_UNK:
+            if ca and cb:
+                self.set(e, game.EDGE_0 if ca == cb else game.EDGE_1)
+        elif ca and not cb:
+            self.set_color(b, ca if s == game.EDGE_0 else COLOR_IN + COLOR_OUT - ca)
+        elif cb and not ca:
+            self.set_color(a, cb if s == game.EDGE_0 else COLOR_IN + COLOR_OUT - cb)
+
+    def propagate(self) -> None:
+        '''applies all deductions to the queued edges and cells, raises Contradiction'''
+        queue = self.queue
+        cqueue = self.cqueue
+        while True:
+            while queue or cqueue:
+                while queue:
+                    e = queue.pop()
+                    for c in self.edge_cells[e]:
+                        self._check_cell(c)
+                    for u in self.edge_vtx[e]:
+                        self._check_vtx(u)
+                    self._check_sides(e)
+                while cqueue:
+                    c = cqueue.pop()
+                    for e in self.cell_edges[c]:
+                        self._check_sides(e)
+            if self.ruleset is None or not (self.changed or self.changed_clues):
+                self.changed.clear()
+                self.changed_clues.clear()
+                return
+            changed = [(self.edge_pos[e][0], self.edge_grid[e]) for e in self.changed]
+            changed += [(rules.KIND_NUM, self.cell_grid[c]) for c in self.changed_clues]
+            self.changed.clear()
+            self.changed_clues.clear()
+            for kind, j in changed:
+                for i, v in self.ruleset.deductions_grid(self.grid, kind, j):
+                    self.set(self.grid_edge[i], v)
+
+    def check_connected(self) -> None:
+        '''
+        all lines and all clues that still need lines
+        have to be reachable from each other through edges that are not crossed out
+
+        lines within the part reached by the last full check, and crosses that can be walked around,
+        leave that part as it was, so the check only goes through the whole board after other changes
+        '''
+        if not self.glob[0] or self.glob[1]:
+            return
+        w = self._write
+        mark, seen, epoch = self.conn
+        if seen is not None and epoch == self.clue_epoch and self._unchanged(mark, seen):
+            w(self.conn, 0, len(self.trail) + 1)
+            return
+
+        start = self.last_end
+        if not (start >= 0 and self.vtx_lines[start]):
+            start = next(u for u, lines in enumerate(self.vtx_lines) if lines)
+
+        state = self.state
+        edge_vtx = self.edge_vtx
+        vtx_lines = self.vtx_lines
+        vtx_adj = self.vtx_adj
+        seen = bytearray(len(self.vtx_edges))
+        seen[start] = 1
+        stack = [start]
+        ends = 0
+        while stack:
+            u = stack.pop()
+            ends += vtx_lines[u]
+            for e, v in vtx_adj[u]:
+                if not seen[v] and state[e] != game.EDGE_0:
+                    seen[v] = 1
+                    stack.append(v)
+        if ends != 2 * self.glob[0]:
+            raise Contradiction('lines can not be connected')
+        for c, n in enumerate(self.clues):
+            if n > 0 and self.cell_lines[c] < n:
+                if not any(seen[edge_vtx[e][0]] for e in self.cell_edges[c]):
+                    raise Contradiction(f'clue at cell {c} can not be reached')
+        w(self.conn, 1, seen)
+        w(self.conn, 2, self.clue_epoch)
+        w(self.conn, 0, len(self.trail) + 1)
+
+    def _unchanged(self, mark: int, seen: bytearray, /) -> bool:
+        '''edges set since trail length mark keep the part of the board reached by a check as it was'''
+        trail = self.trail
+        state = self.state
+        for i in range(mark, len(trail)):
+            arr, e, _ = trail[i]
+            if arr is not state:
+                continue
+            if not seen[self.edge_vtx[e][0]]:
+                # a line outside of the part is not connected to the rest, a cross there changes nothing
+                if state[e] == game.EDGE_1:
+                    return False
+            elif state[e] == game.EDGE_0 and not any(
+                all(state[f] != game.EDGE_0 for f in around) for around in self.edge_around[e]
+            ):
+                return False
+        return True
+
+    def closed(self) -> bool:
+        '''the loop is closed, which means every edge is known'''
+        return bool(self.glob[1])
+
+    def solution(self) -> game.Board:
+        '''copy of the board with the current edge states'''
+        b = self.board.copy()
+        b.data_h[:] = array.array('b', self.state[:self.nh])
+        b.data_v[:] = array.array('b', self.state[self.nh:])
+        return b
+
+    # search
+
+    def _choose(self) -> int:
+        '''
+        most constrained unknown edge: continue the latest path if possible,
+        then any path end, then the tightest clue, then anything
+        '''
+        u = self.last_end
+        if not (u >= 0 and self.vtx_lines[u] == 1 and self.vtx_unk[u]):
+            u = -1
+            best = 5
+            for i, lines in enumerate(self.vtx_lines):
+                if lines == 1 and self.vtx_unk[i] < best:
+                    u = i
+                    best = self.vtx_unk[i]
+                    if best == 2:
+                        break
+        if u >= 0:
+            for e in self.vtx_edges[u]:
+                if self.state[e] == game.EDGE_UNK:
+                    return e
+
+        c = -1
+        best = 5
+        for i, n in enumerate(self.clues):
+            unk = self.cell_unk[i]
+            if n > 0 and unk and unk - (n - self.cell_lines[i]) < best:
+                c = i
+                best = unk - (n - self.cell_lines[i])
+        if c >= 0:
+            for e in self.cell_edges[c]:
+                if self.state[e] == game.EDGE_UNK:
+                    return e
+
+        try:
+            return self.state.index(game.EDGE_UNK)
+        except ValueError:
+            return -1
+
+    def _try(self, e: int, v: int, /) -> bool:
+        try:
+            self.set(e, v)
+            self.propagate()
+            self.check_connected()
+        except Contradiction:
+            return False
+        return True
+
+    def probe(self, deadline: float | None = None, /) -> int:
+        '''
+        tries both values of every unknown edge, and sets the other one where a value fails,
+        until no value fails anymore; raises Contradiction, or SearchLimit once the deadline passes
+        returns the edge whose values both change the most, to branch on next, or -1 if every edge is known
+        '''
+        found = True
+        while found:
+            found = False
+            best, best_score = -1, -1
+            for e, s in enumerate(self.state):
+                if s != game.EDGE_UNK:
+                    continue
+                if deadline is not None and time.monotonic() > deadline:
+                    raise SearchLimit('no answer in time while probing')
+                score = 1
+                for v in (game.EDGE_1, game.EDGE_0):
+                    mark = len(self.trail)
+                    self.probes += 1
+                    ok = self._try(e, v)
+                    score *= len(self.trail) - mark
+                    self.undo(mark)
+                    if not ok:
+                        self.set(e, game.EDGE_0 if v == game.EDGE_1 else game.EDGE_1)
+                        self.propagate()
+                        self.check_connected()
+                        found = True
+                        break
+                else:
+                    if score > best_score:
+                        best, best_score = e, score
+        return best
+
+    def _try_probed(self, e: int, v: int, deadline: float | None, probe: bool, /) -> bool:
+        self.branch = -1
+        if not self._try(e, v):
+            return False
+        if not probe:
+            return True
+        try:
+            self.branch = self.probe(deadline)
+        except Contradiction:
+            return False
+        return True
+
+    def solutions(
+        self, max_nodes: int | None = None, /, *, deadline: float | None = None, probe: bool = True
+    ) -> t.Iterator[game.Board]:
+        '''
+        every solution, found by depth first search; the state is restored afterwards
+        raises SearchLimit after max_nodes decisions or once time.monotonic() passes the deadline
+        probing makes a node slower, but saves most of them on puzzles that need search
+        '''
+        root = len(self.trail)
+        try:
+            try:
+                self.propagate()
+                self.check_connected()
+                self.branch = self.probe(deadline) if probe else -1
+            except Contradiction:
+                return
+
+            # decisions whose second branch is not tried yet
+            stack: list[tuple[int, int]] = []
+            nodes = 0
+            ok = True
+            while True:
+                if ok:
+                    e = self.branch if self.branch >= 0 else self._choose()
+                    if e < 0:
+                        if self.glob[1]:
+                            yield self.solution()
+                        ok = False
+                        continue
+                    if max_nodes is not None and nodes >= max_nodes:
+                        raise SearchLimit(f'no answer after {nodes} nodes')
+                    if deadline is not None and time.monotonic() > deadline:
+                        raise SearchLimit(f'no answer in time after {nodes} nodes')
+                    nodes += 1
+                    self.nodes += 1
+                    stack.append((len(self.trail), e))
+                    ok = self._try_probed(e, game.EDGE_1, deadline, probe)
+                else:
+                    if not stack:
+                        break
+                    mark, e = stack.pop()
+                    self.undo(mark)
+                    ok = self._try_probed(e, game.EDGE_0, deadline, probe)
+        finally:
+            self.undo(root)
+
+
+def solve(board: game.Board, /, *, use_rules: bool = True) -> game.Board | None:
+    '''a solved copy of the board, or None if there is no solution'''
+    try:
+        s = Solver(board, rules.load_rules() if use_rules else None)
+    except Contradiction:
+        return None
+    return next(s.solutions(), None)
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class SolutionCount:
+    # number of solutions found, at most the limit it was counted to
+    count: int
+    solutions: list[game.Board]
+    # edges that differ between the first two solutions: (rules kind, x, y)
+    diff: list[tuple[int, int, int]]
+
+    @property
+    def unique(self) -> bool:
+        return self.count == 1
+
+
+def count_solutions(board: game.Board, limit: int = 2, /, *, use_rules: bool = True) -> SolutionCount:
+    '''counts solutions of the board, the search stops as soon as limit of them are found'''
+    try:
+        s = Solver(board, rules.load_rules() if use_rules else None)
+    except Contradiction:
+        return SolutionCount(0, [], [])
+    sols = list(itertools.islice(s.solutions(), limit))
+
+    diff = []
+    if len(sols) >= 2:
+        a, b = sols[0], sols[1]
+        for e, (kind, x, y) in enumerate(s.edge_pos):
+            if e < s.nh:
+                if a.data_h[e] != b.data_h[e]:
+                    diff.append((kind, x, y))
+            elif a.data_v[e - s.nh] != b.data_v[e - s.nh]:
+                diff.append((kind, x, y))
+    return SolutionCount(len(sols), sols, diff)
+
+
+def is_solved(board: game.Board, /) -> bool:
+    '''every edge is known, every clue is satisfied and the lines form a single loop'''
+    if game.EDGE_UNK in board.data_h or game.EDGE_UNK in board.data_v:
+        return False
+    counts = board.counts()
+    for n, lines in zip(board.data_num, counts.cell_lines):
+        if n != game.NUM_UNK and n != lines:
+            return False
+    if any(lines not in (0, 2) for lines in counts.vtx_lines):
+        return False
+
+    # walk along the loop from any line and see if it covers all of them
+    total = board.data_h.count(game.EDGE_1) + board.data_v.count(game.EDGE_1)
+    if not total:
+        return False
+    w = board.x + 1
+    start = next(i for i, lines in enumerate(counts.vtx_lines) if lines)
+    prev, cur, steps = -1, start, 0
+    while True:
+        y, x = divmod(cur, w)
+        for nxt, line in (
+            (cur - 1, board._get_edge_h(x - 1, y)),
+            (cur + 1, board._get_edge_h(x, y)),
+            (cur - w, board._get_edge_v(x, y - 1)),
+            (cur + w, board._get_edge_v(x, y)),
+        ):
+            if line == game.EDGE_1 and nxt != prev:
+                break
+        prev, cur = cur, nxt
+        steps += 1
+        if cur == start:
+            return steps == total
@@ -0,0 +1,68 @@
+from __future__ import annotations
+import contextlib
+import io
+import os
+import pathlib
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import batch
+import game
+import generator
+
+
+class SolveTest(unittest.TestCase):
+    def test_status(self) -> None:
+        puzzle = generator.generate(6, 6, generator.DIFFICULTY_SEARCH, rng=random.Random(0))
+        empty = game.Board(3, 3)
+        none = game.Board(1, 1)
+        none.data_num[0] = 0
+        for nodes in (batch.SAT_AFTER_NODES, 0):
+            # with no search nodes at all, everything that needs search goes to SAT
+            with self.subTest(nodes=nodes), mock.patch.object(batch, 'SAT_AFTER_NODES', nodes):
+                for board, unique, status in (
+                    (puzzle, True, batch.SOLVE_OK),
+                    (empty, False, batch.SOLVE_OK),
+                    (empty, True, batch.SOLVE_MULTIPLE),
+                    (none, True, batch.SOLVE_NONE),
+                ):
+                    res = batch._solve(batch.SolveJob(0, board, None, unique))
+                    self.assertEqual(res.status, status, (str(board), unique))
+
+    def test_timeout(self) -> None:
+        res = batch._solve(batch.SolveJob(0, game.Board(8, 8), 0, True))
+        self.assertEqual(res.status, batch.SOLVE_TIMEOUT)
+
+
+class CommandTest(unittest.TestCase):
+    # a malformed record in the middle of a corpus, the records after it are still read
+    CORPUS: str = '..3.2....\n3x3:zz\n\n + - + - + \n | 3   3 | \n + - + - + \n\n..3.\n'
+
+    def test_solve(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            corpus = pathlib.Path(d, 'corpus.txt')
+            corpus.write_text(self.CORPUS)
+            report = pathlib.Path(d, 'report.tsv')
+            with contextlib.redirect_stderr(io.StringIO()):
+                batch.main(['solve', str(corpus), '-j', '1', '-o', str(report)])
+            rows = [line.split('\t') for line in report.read_text().splitlines()[1:]]
+        self.assertEqual([row[:2] for row in rows], [['0', 'solved'], ['1', 'error'], ['2', 'solved'], ['3', 'solved']])
+        self.assertIn('ParseError: line 2: ', rows[1][4])
+
+    def test_thumbs(self) -> None:
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        with tempfile.TemporaryDirectory() as d:
+            corpus = pathlib.Path(d, 'corpus.txt')
+            corpus.write_text(self.CORPUS)
+            out = pathlib.Path(d, 'thumbs')
+            log = io.StringIO()
+            with contextlib.redirect_stderr(log):
+                batch.main(['thumbs', str(corpus), str(out), '-j', '1'])
+            self.assertEqual(sorted(p.name for p in out.iterdir()), ['000000.png', '000002.png', '000003.png'])
+        self.assertIn('#1: line 2: ', log.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+import os
+import random
+import struct
+import tempfile
+import unittest
+
+import binfmt
+import game
+
+
+def _random_board(w: int, h: int, rng: random.Random, /, *, edges: bool) -> game.Board:
+    b = game.Board(w, h)
+    for i in range(w * h):
+        b.data_num[i] = rng.choice((game.NUM_UNK, 0, 1, 2, 3))
+    if edges:
+        for arr in (b.data_h, b.data_v):
+            for i in range(len(arr)):
+                arr[i] = rng.choice((game.EDGE_UNK, game.EDGE_0, game.EDGE_1))
+    return b
+
+
+def _same(a: game.Board, b: game.Board, /) -> bool:
+    return (a.x, a.y, a.data_num, a.data_h, a.data_v) == (b.x, b.y, b.data_num, b.data_h, b.data_v)
+
+
+class RecordTest(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        rng = random.Random(0)
+        # sizes whose parts end inside a byte and on its boundary
+        for w, h in ((1, 1), (2, 2), (3, 5), (4, 4), (7, 9), (8, 8), (31, 17)):
+            for edges in (False, True):
+                with self.subTest(size=(w, h), edges=edges):
+                    b = _random_board(w, h, rng, edges=edges)
+                    self.assertTrue(_same(binfmt.decode(binfmt.encode(b)), b))
+
+    def test_edges_only_when_known(self) -> None:
+        b = _random_board(5, 4, random.Random(1), edges=False)
+        short = binfmt.encode(b)
+        self.assertLess(len(short), len(binfmt.encode(b, edges=True)))
+        b._set_edge_v(5, 3, game.EDGE_1)
+        self.assertTrue(_same(binfmt.decode(binfmt.encode(b)), b))
+        self.assertEqual(binfmt.encode(b, edges=False), short)
+
+    def test_offset(self) -> None:
+        a = _random_board(3, 2, random.Random(2), edges=True)
+        b = _random_board(2, 3, random.Random(3), edges=False)
+        ra = binfmt.encode(a)
+        self.assertTrue(_same(binfmt.decode(ra + binfmt.encode(b), len(ra)), b))
+
+
+class CorpusTest(unittest.TestCase):
+    def setUp(self) -> None:
+        fd, self.path = tempfile.mkstemp(suffix='.slkc')
+        os.close(fd)
+
+    def tearDown(self) -> None:
+        os.remove(self.path)
+
+    def test_round_trip(self) -> None:
+        rng = random.Random(4)
+        boards = [_random_board(rng.randint(1, 12), rng.randint(1, 12), rng, edges=i % 2 == 0) for i in range(20)]
+        self.assertEqual(binfmt.write_corpus(self.path, iter(boards)), len(boards))
+        with binfmt.Corpus(self.path) as c:
+            self.assertEqual(len(c), len(boards))
+            self.assertTrue(all(_same(a, b) for a, b in zip(c, boards, strict=True)))
+            self.assertTrue(_same(c[-1], boards[-1]))
+            with self.assertRaises(IndexError):
+                c[len(boards)]
+
+    def test_empty(self) -> None:
+        self.assertEqual(binfmt.write_corpus(self.path, []), 0)
+        with binfmt.Corpus(self.path) as c:
+            self.assertEqual(list(c), [])
+
+    def test_bad_files(self) -> None:
+        header = struct.Struct('<4sIQQ')
+        for name, data in (
+            ('empty', b''),
+            ('short', b'SLKC\x01'),
+            ('magic', header.pack(b'SLKX', 1, 0, header.size)),
+            ('version', header.pack(b'SLKC', 2, 0, header.size)),
+        ):
+            with self.subTest(name):
+                with open(self.path, 'wb') as f:
+                    f.write(data)
+                with self.assertRaises(ValueError):
+                    binfmt.Corpus(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+from __future__ import annotations
+import io
+import random
+import unittest
+
+import game
+
+
+def _random_board(w: int, h: int, rng: random.Random, /) -> game.Board:
+    b = game.Board(w, h)
+    values = (game.EDGE_UNK, game.EDGE_0, game.EDGE_1)
+    for i in range(len(b.data_h)):
+        b.data_h[i] = rng.choice(values)
+    for i in range(len(b.data_v)):
+        b.data_v[i] = rng.choice(values)
+    return b
+
+
+class CountsTest(unittest.TestCase):
+    def test_naive(self) -> None:
+        rng = random.Random(0)
+        for w, h in ((1, 1), (1, 4), (5, 1), (3, 3), (7, 4), (16, 9)):
+            b = _random_board(w, h, rng)
+            with self.subTest(w=w, h=h):
+                c = b.counts()
+                cells = [
+                    [b._get_edge_h(x, y), b._get_edge_h(x, y + 1), b._get_edge_v(x, y), b._get_edge_v(x + 1, y)]
+                    for y in range(h)
+                    for x in range(w)
+                ]
+                # edges outside of the board read as crossed out
+                vertices = [
+                    [b._get_edge_h(x - 1, y), b._get_edge_h(x, y), b._get_edge_v(x, y - 1), b._get_edge_v(x, y)]
+                    for y in range(h + 1)
+                    for x in range(w + 1)
+                ]
+                self.assertEqual(list(c.cell_lines), [es.count(game.EDGE_1) for es in cells])
+                self.assertEqual(list(c.cell_unk), [es.count(game.EDGE_UNK) for es in cells])
+                self.assertEqual(list(c.vtx_lines), [es.count(game.EDGE_1) for es in vertices])
+                self.assertEqual(list(c.vtx_unk), [es.count(game.EDGE_UNK) for es in vertices])
+
+
+class ChangesTest(unittest.TestCase):
+    def test_subscribe(self) -> None:
+        b = game.Board(3, 2)
+        b._set_edge_h(0, 0, game.EDGE_1)
+        ch = b.subscribe()
+        other = b.subscribe()
+        b._set_num(1, 1, 2)
+        b._set_edge_h(2, 2, game.EDGE_0)
+        b._set_edge_v(3, 1, game.EDGE_1)
+        b._set_vtx(1, 2, 1)
+        # setting what is already there is not a change
+        b._set_edge_h(0, 0, game.EDGE_1)
+        b._set_num(0, 0, game.NUM_UNK)
+        got = ch.drain()
+        self.assertEqual(got.cells, {(1, 1)})
+        self.assertEqual(got.edges_h, {(2, 2)})
+        self.assertEqual(got.edges_v, {(3, 1)})
+        self.assertEqual(got.vertices, {(1, 2)})
+        self.assertFalse(ch)
+
+        b.unsubscribe(other)
+        b._set_edge_v(0, 0, game.EDGE_0)
+        self.assertEqual(ch.drain().edges_v, {(0, 0)})
+        # an unsubscribed one keeps what it had, and gets nothing new
+        self.assertEqual(other.edges_v, {(3, 1)})
+        b.unsubscribe(ch)
+        b._set_num(2, 0, 1)
+        self.assertFalse(ch)
+
+    def test_copy(self) -> None:
+        b = game.Board(2, 2)
+        ch = b.subscribe()
+        c = b.copy()
+        c._set_edge_h(0, 0, game.EDGE_1)
+        self.assertFalse(ch)
+
+
+class TextTest(unittest.TestCase):
+    # str() of the board below as the baseline built it, glyph by glyph
+    ART: str = '+ - + x +   +\n| 3          \n+   +   +   +\n    | 2   0 x\n+   +   + - +'
+
+    def setUp(self) -> None:
+        b = self.board = game.Board(3, 2)
+        b._set_num(0, 0, 3)
+        b._set_num(1, 1, 2)
+        b._set_num(2, 1, 0)
+        b._set_edge_h(0, 0, game.EDGE_1)
+        b._set_edge_h(1, 0, game.EDGE_0)
+        b._set_edge_h(2, 2, game.EDGE_1)
+        b._set_edge_v(0, 0, game.EDGE_1)
+        b._set_edge_v(1, 1, game.EDGE_1)
+        b._set_edge_v(3, 1, game.EDGE_0)
+
+    def test_str(self) -> None:
+        self.assertEqual(str(self.board), self.ART)
+        self.assertEqual(list(self.board.rows()), self.ART.split('\n'))
+        f = io.StringIO()
+        self.board.write_to(f)
+        self.assertEqual(f.getvalue(), self.ART)
+
+    def test_empty(self) -> None:
+        self.assertEqual(str(game.Board(2, 1)), '+   +   +\n         \n+   +   +')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+from __future__ import annotations
+import random
+import unittest
+
+import generator
+import solver
+
+
+class RandomLoopTest(unittest.TestCase):
+    def test_tiny(self) -> None:
+        # a region of a single cell would be a loop around it with a clue of 4
+        for w, h in ((2, 1), (1, 2), (1, 3), (3, 1), (2, 2)):
+            for seed in range(5):
+                with self.subTest(w=w, h=h, seed=seed):
+                    b = generator.random_loop(w, h, random.Random(seed))
+                    self.assertTrue(solver.is_solved(b))
+                    self.assertLess(max(b.counts().cell_lines), 4)
+
+    def test_no_room(self) -> None:
+        with self.assertRaises(ValueError):
+            generator.random_loop(1, 1, random.Random(0))
+
+
+class GenerateTest(unittest.TestCase):
+    def test_tiny(self) -> None:
+        # every size either gives a unique puzzle or fails, none of them searches forever
+        for w in range(1, 4):
+            for h in range(1, 4):
+                for difficulty in range(len(generator.DIFFICULTY_NAMES)):
+                    with self.subTest(w=w, h=h, difficulty=difficulty):
+                        try:
+                            puzzle = generator.generate(w, h, difficulty, rng=random.Random(0))
+                        except ValueError:
+                            continue
+                        self.assertTrue(solver.count_solutions(puzzle).unique)
+                        self.assertLess(max(puzzle.data_num), 4)
+
+    def test_domino(self) -> None:
+        # the only loop of a 2x1 board is the domino, rules find it
+        puzzle = generator.generate(2, 1, generator.DIFFICULTY_RULES, rng=random.Random(0))
+        self.assertTrue(solver.count_solutions(puzzle).unique)
+
+    def test_no_room(self) -> None:
+        with self.assertRaises(ValueError):
+            generator.generate(1, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+from __future__ import annotations
+import os
+import unittest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import game
+import hittest
+from hittest import Hit
+from main import MAX_ZOOM, MIN_ZOOM
+from point import Point
+from render import CELL_SIZE
+from view import View
+
+ZOOMS: tuple[float, ...] = (MIN_ZOOM, CELL_SIZE, MAX_ZOOM)
+
+
+class HitTestTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.board = game.Board(3, 2)
+
+    def hit(self, view: View, x: float, y: float) -> Hit | None:
+        return hittest.hit_test(self.board, view, view.map(Point(x, y)))
+
+    def test_tolerances(self) -> None:
+        for zoom in ZOOMS:
+            with self.subTest(zoom=zoom):
+                tv, te = hittest.tolerances(zoom)
+                # the middle of a cell is left to it, as wide as a vertex at least
+                self.assertGreaterEqual(1 - 2 * te, 2 * tv)
+                self.assertGreaterEqual(tv, hittest.VERTEX_TOLERANCE)
+                self.assertGreaterEqual(te * zoom, min(hittest.MIN_TOLERANCE_PIXELS, zoom / 4))
+
+    def test_kinds(self) -> None:
+        for zoom in ZOOMS:
+            view = View(zoom, Point(-0.5, -0.25))
+            tv, te = hittest.tolerances(zoom)
+            for x, y, hit in (
+                (1, 1, Hit(hittest.HIT_VERTEX, 1, 1)),
+                (1 + 0.9 * tv, 1 - 0.9 * tv, Hit(hittest.HIT_VERTEX, 1, 1)),
+                (1.5, 0, Hit(hittest.HIT_EDGE_H, 1, 0)),
+                (1.5, 0.9 * te, Hit(hittest.HIT_EDGE_H, 1, 0)),
+                (2, 1.5, Hit(hittest.HIT_EDGE_V, 2, 1)),
+                (2 - 0.9 * te, 1.5, Hit(hittest.HIT_EDGE_V, 2, 1)),
+                (1.5, 1.5, Hit(hittest.HIT_CELL, 1, 1)),
+                (0.5, 0.5, Hit(hittest.HIT_CELL, 0, 0)),
+                (-1, -1, None),
+                (3.5, 0.5, None),
+            ):
+                with self.subTest(zoom=zoom, x=x, y=y):
+                    self.assertEqual(self.hit(view, x, y), hit)
+
+    def test_along(self) -> None:
+        for zoom in ZOOMS:
+            view = View(zoom, Point(-0.5, -0.25))
+            with self.subTest(zoom=zoom):
+                # through the middle of a row of cells, every edge between them is crossed
+                hits = hittest.hits_along(self.board, view, view.map(Point(0.5, 0.5)), view.map(Point(2.5, 0.5)))
+                self.assertEqual(
+                    [(h.kind, h.x, h.y) for h in hits],
+                    [
+                        (hittest.HIT_CELL, 0, 0),
+                        (hittest.HIT_EDGE_V, 1, 0),
+                        (hittest.HIT_CELL, 1, 0),
+                        (hittest.HIT_EDGE_V, 2, 0),
+                        (hittest.HIT_CELL, 2, 0),
+                    ],
+                )
+                # along the top border, from vertex to vertex
+                hits = hittest.hits_along(self.board, view, view.map(Point(0, 0)), view.map(Point(2, 0)))
+                self.assertEqual(
+                    [(h.kind, h.x, h.y) for h in hits],
+                    [
+                        (hittest.HIT_VERTEX, 0, 0),
+                        (hittest.HIT_EDGE_H, 0, 0),
+                        (hittest.HIT_VERTEX, 1, 0),
+                        (hittest.HIT_EDGE_H, 1, 0),
+                        (hittest.HIT_VERTEX, 2, 0),
+                    ],
+                )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+from __future__ import annotations
+import io
+import unittest
+
+import game
+import reader
+
+ART: str = '''\
+ +   + - + 
+   3 |  (x)
+ + x +   + 
+'''
+
+
+class ParseArtTest(unittest.TestCase):
+    def test_values(self) -> None:
+        b = reader.parse_art(ART.splitlines())
+        self.assertEqual((b.x, b.y), (2, 1))
+        self.assertEqual(b.data_num.tolist(), [3, game.NUM_UNK])
+        self.assertEqual(b.data_h.tolist(), [game.EDGE_UNK, game.EDGE_1, game.EDGE_0, game.EDGE_UNK])
+        self.assertEqual(b.data_v.tolist(), [game.EDGE_UNK, game.EDGE_1, game.EDGE_UNK])
+        # a marked conclusion is set once the rule is applied
+        b = reader.parse_art(ART.splitlines(), initial=False)
+        self.assertEqual(b.data_v.tolist(), [game.EDGE_UNK, game.EDGE_1, game.EDGE_0])
+
+    def test_round_trip(self) -> None:
+        b = reader.parse_art(ART.splitlines(), initial=False)
+        again = reader.parse_art([f' {line} ' for line in b.rows()])
+        self.assertEqual(str(again), str(b))
+
+    def test_errors(self) -> None:
+        lines = ART.splitlines()
+        for art, first, line, text in (
+            ([], 5, 5, 'no board'),
+            (['# only a comment'], 5, 5, 'no board'),
+            ([lines[0], lines[1] + ' ', lines[2]], 10, 11, 'characters'),
+            (lines[:2], 10, 10, 'do not make a board'),
+            ([lines[0], lines[1].replace('3', '4'), lines[2]], 10, 11, "unexpected '4' in column 4"),
+            ([lines[0], lines[1], lines[2].replace('x', '?')], 1, 3, "unexpected '?' in column 4"),
+        ):
+            with self.subTest(art=art):
+                with self.assertRaises(reader.ParseError) as cm:
+                    reader.parse_art(art, first)
+                self.assertEqual(cm.exception.line, line)
+                self.assertIn(text, str(cm.exception))
+                self.assertTrue(str(cm.exception).startswith(f'line {line}: '))
+
+
+class ParseLineTest(unittest.TestCase):
+    def test_formats(self) -> None:
+        b = reader.parse_line('..3.')
+        self.assertEqual((b.x, b.y), (2, 2))
+        self.assertEqual(b.data_num.tolist(), [game.NUM_UNK, game.NUM_UNK, 3, game.NUM_UNK])
+        b = reader.parse_line('3x2:a3b2a')
+        self.assertEqual((b.x, b.y), (3, 2))
+        self.assertEqual(b.data_num.tolist(), [game.NUM_UNK, 3, game.NUM_UNK, game.NUM_UNK, 2, game.NUM_UNK])
+
+    def test_errors(self) -> None:
+        for s, text in (
+            ('..3', 'do not make a square'),
+            ('3x3:..3', 'cells given for a 3x3 board'),
+            ('2x2t1:....', 'only square grids'),
+            ('..4.', 'not a puzzle'),
+        ):
+            with self.subTest(s=s):
+                with self.assertRaises(reader.ParseError) as cm:
+                    reader.parse_line(s, 7)
+                self.assertEqual(cm.exception.line, 7)
+                self.assertIn(text, str(cm.exception))
+
+
+class ReadBoardsTest(unittest.TestCase):
+    def test_mixed(self) -> None:
+        text = '# a corpus\n\n' + ART + '\n..3.\n5x5t0:a3b2e1c0h3a\n' + ART
+        boards = list(reader.read_boards(io.StringIO(text)))
+        self.assertEqual([(b.x, b.y) for b in boards], [(2, 1), (2, 2), (5, 5), (2, 1)])
+
+    def test_error_lines(self) -> None:
+        lines = ART.splitlines()
+        bad_art = '\n'.join([lines[0], lines[1] + ' ', lines[2]]) + '\n'
+        for text, line in (
+            ('# comment\n\n..3.\n..4.\n', 4),
+            ('..3.\n\n' + ART + '\n' + bad_art, 8),
+            ('# c\n' + bad_art + '\n..3.\n', 3),
+            ('# c\n' + ART + '\n# c\n\n2x3:.....\n', 8),
+        ):
+            with self.subTest(text=text):
+                with self.assertRaises(reader.ParseError) as cm:
+                    list(reader.read_boards(io.StringIO(text)))
+                self.assertEqual(cm.exception.line, line)
+
+    def test_records_go_on_after_errors(self) -> None:
+        lines = ART.splitlines()
+        bad_art = '\n'.join([lines[0], lines[1] + ' ', lines[2]]) + '\n'
+        text = '..3.\n3x3:zz\n\n' + bad_art + '\n' + ART + '\n5x5t0:a3b2e1c0h3a\n'
+        recs = list(reader.read_records(io.StringIO(text)))
+        found = [r.line if isinstance(r, reader.ParseError) else (r.x, r.y) for r in recs]
+        self.assertEqual(found, [(2, 2), 2, 5, (2, 1), (5, 5)])
+
+
+if __name__ == '__main__':
+    unittest.main()
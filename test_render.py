@@ -0,0 +1,50 @@
+from __future__ import annotations
+import array
+import os
+import random
+import unittest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame as pg
+
+import game
+import generator
+import render
+from point import Point
+from view import View
+
+
+class TileTest(unittest.TestCase):
+    def setUp(self) -> None:
+        pg.font.init()
+
+    def test_same_as_plain(self) -> None:
+        # at a mip level tiles are blitted as they are, so they have to look like the board drawn in one piece
+        b = generator.random_loop(20, 20, random.Random(3))
+        b.data_num = array.array('b', b.counts().cell_lines)
+        b._set_edge_h(3, 4, game.EDGE_UNK)
+        for zoom in (8, 16, 64):
+            for pos in (Point(-0.3, -0.7), Point(0.37, 0.11), Point(-1, -1)):
+                with self.subTest(zoom=zoom, pos=pos):
+                    plain = pg.Surface((500, 400))
+                    tiled = pg.Surface((500, 400))
+                    render.Renderer(b).draw(plain, View(zoom, pos), glow=False)
+                    render.Renderer(b, tiled=True).draw(tiled, View(zoom, pos), glow=False)
+                    self.assertEqual(bytes(plain.get_view('2')), bytes(tiled.get_view('2')))
+
+
+class GlowTest(unittest.TestCase):
+    def test_large_target(self) -> None:
+        # the blur radii shrink with the resolution of the glow, but never to nothing
+        g = render.Glow(game.Board(10, 10))
+        target = pg.Surface((4400, 4100))
+        target.fill((255, 255, 255), (100, 100, 200, 200))
+        g.apply(target, View(32, Point(0, 0)))
+        self.assertGreater(g.scale, 16)
+        self.assertTrue(g.blur)
+        self.assertTrue(all(g.blur))
+        g.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+from __future__ import annotations
+import array
+import random
+import unittest
+
+import game
+import generator
+import rules
+
+# a clue of 1 with lines above and on the left, so the edge on its right is crossed out
+SAMPLE: list[str] = [
+    ' + - +   + ',
+    ' | 1(x)    ',
+    ' +   +   + ',
+]
+
+
+def _puzzle(w: int, h: int, seed: int, /) -> tuple[game.Board, game.Board]:
+    '''(solution, puzzle with some of its clues and edges) of a random loop'''
+    rng = random.Random(seed)
+    solution = generator.random_loop(w, h, rng)
+    solution.data_num = array.array('b', solution.counts().cell_lines)
+    puzzle = game.Board(w, h)
+    for i, n in enumerate(solution.data_num):
+        if rng.random() < 0.5:
+            puzzle.data_num[i] = n
+    for arr, src in ((puzzle.data_h, solution.data_h), (puzzle.data_v, solution.data_v)):
+        for i, v in enumerate(src):
+            if rng.random() < 0.2:
+                arr[i] = v
+    return solution, puzzle
+
+
+class CompileTest(unittest.TestCase):
+    def test_sample(self) -> None:
+        r = rules.compile_rule(SAMPLE)
+        self.assertEqual((r.w, r.h), (1, 1))
+        self.assertEqual(
+            set(r.premise),
+            {(rules.KIND_NUM, 0, 0, 1), (rules.KIND_H, 0, 0, game.EDGE_1), (rules.KIND_V, 0, 0, game.EDGE_1)},
+        )
+        self.assertEqual(r.conclusion, ((rules.KIND_V, 1, 0, game.EDGE_0),))
+
+
+class VariantsTest(unittest.TestCase):
+    def test_sample(self) -> None:
+        vs = rules.variants(rules.compile_rule(SAMPLE))
+        self.assertEqual(len(vs), 8)
+        # turned by a quarter, and mirrored left to right
+        turned = [
+            ' + - + ',
+            '   1 | ',
+            ' +(x)+ ',
+        ]
+        mirrored = [
+            ' +   + - + ',
+            '    (x)1 | ',
+            ' +   +   + ',
+        ]
+        self.assertIn(rules.compile_rule(turned), vs)
+        self.assertIn(rules.compile_rule(mirrored), vs)
+        # every variant has the same variants
+        for v in vs:
+            self.assertEqual(set(rules.variants(v)), set(vs))
+
+    def test_symmetric(self) -> None:
+        zero = [
+            ' +(x)+ ',
+            '(x)0(x)',
+            ' +(x)+ ',
+        ]
+        self.assertEqual(len(rules.variants(rules.compile_rule(zero))), 1)
+
+    def test_stored_once(self) -> None:
+        rs = rules.load_rules()
+        self.assertEqual(len(set(rs.rules)), len(rs))
+        with open(rules.RULES_PATH) as f:
+            sources = list(rules.read_rules(f))
+        self.assertLess(len(rs), 8 * len(sources))
+
+
+class DeductionsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.ruleset = rules.load_rules()
+
+    def test_at_every_element(self) -> None:
+        # deductions around single elements together are the ones of a pass over the whole board
+        m = self.ruleset.margin
+        for seed in range(10):
+            _, b = _puzzle(6, 5, seed)
+            with self.subTest(seed=seed):
+                around: set[tuple[int, int, int, int]] = set()
+                for kind in (rules.KIND_NUM, rules.KIND_H, rules.KIND_V):
+                    for y in range(-m, b.y + m + 1):
+                        for x in range(-m, b.x + m + 1):
+                            around.update(self.ruleset.deductions_at(b, kind, x, y))
+                self.assertEqual(around, set(self.ruleset.deductions(b)))
+
+    def test_apply_changes(self) -> None:
+        # applying rules only around new clues gives the same board as applying them to all of it
+        for seed in range(10):
+            _, b = _puzzle(8, 8, seed)
+            with self.subTest(seed=seed):
+                full = b.copy()
+                self.ruleset.apply(full)
+                part = b.copy()
+                late = [i for i in range(len(b.data_num)) if i % 3 == 0]
+                for i in late:
+                    part.data_num[i] = game.NUM_UNK
+                self.ruleset.apply(part)
+                ch = part.subscribe()
+                for i in late:
+                    part._set_num(i % b.x, i // b.x, b.data_num[i])
+                part.unsubscribe(ch)
+                self.ruleset.apply(part, ch.drain())
+                self.assertEqual(str(part), str(full))
+
+    def test_sound(self) -> None:
+        # nothing follows from a solved board, and nothing contradicts it, not even for a domino
+        for w, h in ((2, 1), (1, 2), (2, 2), (3, 2), (3, 3), (5, 5), (8, 8)):
+            for seed in range(10):
+                solution, _ = _puzzle(w, h, seed)
+                with self.subTest(w=w, h=h, seed=seed):
+                    self.assertEqual(list(self.ruleset.deductions(solution)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
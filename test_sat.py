@@ -0,0 +1,77 @@
+from __future__ import annotations
+import random
+import unittest
+
+import game
+import generator
+import sat
+import solver
+
+
+class SolveTest(unittest.TestCase):
+    def test_keeps_given_lines(self) -> None:
+        # a loop through the given lines has to be found even when a model also has a loop without them
+        for w in range(3, 8):
+            for h in range(1, 5):
+                with self.subTest(size=(w, h)):
+                    b = game.Board(w, h)
+                    b._set_edge_h(w - 1, 0, game.EDGE_1)
+                    b._set_edge_v(0, h - 1, game.EDGE_1)
+                    res = sat.solve(b)
+                    self.assertIsNotNone(res)
+                    assert res is not None
+                    self.assertEqual(res._get_edge_h(w - 1, 0), game.EDGE_1)
+                    self.assertEqual(res._get_edge_v(0, h - 1), game.EDGE_1)
+                    self.assertTrue(solver.is_solved(res))
+
+    def test_agrees_with_solver(self) -> None:
+        for difficulty in (generator.DIFFICULTY_RULES, generator.DIFFICULTY_SEARCH):
+            for seed in range(4):
+                with self.subTest(difficulty=difficulty, seed=seed):
+                    puzzle = generator.generate(7, 7, difficulty, rng=random.Random(seed))
+                    res = sat.solve(puzzle)
+                    assert res is not None
+                    self.assertTrue(solver.is_solved(res))
+                    self.assertEqual(str(res), str(solver.solve(puzzle)))
+
+    def test_other_than(self) -> None:
+        puzzle = generator.generate(6, 6, generator.DIFFICULTY_SEARCH, rng=random.Random(2))
+        res = sat.solve(puzzle)
+        assert res is not None
+        self.assertIsNone(sat.solve(puzzle, other_than=res))
+        b = game.Board(3, 3)
+        b.data_num[0] = 3
+        first = sat.solve(b)
+        second = sat.solve(b, other_than=first)
+        assert second is not None
+        self.assertTrue(solver.is_solved(second))
+        self.assertNotEqual(str(first), str(second))
+
+    def test_deadline(self) -> None:
+        puzzle = generator.generate(10, 10, generator.DIFFICULTY_SEARCH, rng=random.Random(0))
+        with self.assertRaises(solver.SearchLimit):
+            sat.solve(puzzle, deadline=0)
+
+    def test_no_solution(self) -> None:
+        b = game.Board(1, 1)
+        b.data_num[0] = 0
+        self.assertIsNone(sat.solve(b))
+
+
+class CdclSolverTest(unittest.TestCase):
+    def test_sat_and_unsat(self) -> None:
+        s = sat.CdclSolver(3)
+        for c in ([1, 2], [-1, 3], [-2, 3], [-3, 1]):
+            s.add_clause(c)
+        self.assertTrue(s.solve())
+        model = s.model()
+        self.assertTrue(model[1] and model[3])
+        self.assertFalse(s.solve([-3]))
+        # a failure under assumptions does not stick
+        self.assertTrue(s.solve())
+        s.add_clause([-1])
+        self.assertFalse(s.solve())
+
+
+if __name__ == '__main__':
+    unittest.main()
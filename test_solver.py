@@ -0,0 +1,161 @@
+from __future__ import annotations
+import random
+import unittest
+
+import game
+import generator
+import rules
+import sat
+import solver
+
+
+def _two_loops() -> game.Board:
+    '''a 3x1 board with a loop around each end cell, the middle cell crossed out above and below'''
+    b = game.Board(3, 1)
+    for x in (0, 2):
+        b._set_edge_h(x, 0, game.EDGE_1)
+        b._set_edge_h(x, 1, game.EDGE_1)
+        b._set_edge_v(x, 0, game.EDGE_1)
+        b._set_edge_v(x + 1, 0, game.EDGE_1)
+    for y in (0, 1):
+        b._set_edge_h(1, y, game.EDGE_0)
+    return b
+
+
+def _loops(w: int, h: int) -> list[game.Board]:
+    '''every solution of an empty w x h board, as the outlines of connected sets of cells'''
+    res = []
+    for mask in range(1, 1 << (w * h)):
+        def inside(x: int, y: int) -> bool:
+            return 0 <= x < w and 0 <= y < h and bool(mask >> (y * w + x) & 1)
+
+        b = game.Board(w, h)
+        for y in range(h + 1):
+            for x in range(w):
+                b._set_edge_h(x, y, int(inside(x, y - 1) != inside(x, y)))
+        for y in range(h):
+            for x in range(w + 1):
+                b._set_edge_v(x, y, int(inside(x - 1, y) != inside(x, y)))
+        if solver.is_solved(b):
+            res.append(b)
+    return res
+
+
+class SolveTest(unittest.TestCase):
+    def test_search_puzzles(self) -> None:
+        # puzzles that rules alone do not solve take a few decisions, not thousands
+        for size in (10, 15):
+            for seed in range(2):
+                with self.subTest(size=size, seed=seed):
+                    puzzle = generator.generate(size, size, generator.DIFFICULTY_SEARCH, rng=random.Random(seed))
+                    res = next(solver.Solver(puzzle, rules.load_rules()).solutions(50))
+                    self.assertTrue(solver.is_solved(res))
+                    self.assertEqual(str(res), str(sat.solve(puzzle)))
+
+    def test_probing_finds_the_same_solutions(self) -> None:
+        b = game.Board(3, 3)
+        b.data_num[4] = 2
+        b.data_num[0] = 1
+        s = solver.Solver(b)
+        with_probing = {str(res) for res in s.solutions()}
+        without = {str(res) for res in s.solutions(probe=False)}
+        self.assertEqual(with_probing, without)
+        self.assertGreater(len(with_probing), 1)
+
+    def test_keeps_given_edges(self) -> None:
+        b = game.Board(4, 3)
+        b._set_edge_h(3, 0, game.EDGE_1)
+        b._set_edge_v(0, 2, game.EDGE_1)
+        b._set_edge_h(1, 1, game.EDGE_0)
+        res = solver.solve(b)
+        assert res is not None
+        self.assertTrue(solver.is_solved(res))
+        self.assertEqual(res._get_edge_h(3, 0), game.EDGE_1)
+        self.assertEqual(res._get_edge_v(0, 2), game.EDGE_1)
+        self.assertEqual(res._get_edge_h(1, 1), game.EDGE_0)
+
+    def test_domino_loop(self) -> None:
+        # two 3s side by side do not force the line between them when the loop goes around both
+        b = game.Board(2, 1)
+        b.data_num[0] = b.data_num[1] = 3
+        res = solver.solve(b)
+        assert res is not None
+        self.assertTrue(solver.is_solved(res))
+        self.assertEqual(res._get_edge_v(1, 0), game.EDGE_0)
+
+    def test_no_solution(self) -> None:
+        b = game.Board(1, 1)
+        b.data_num[0] = 0
+        self.assertIsNone(solver.solve(b))
+        # two loops given at once
+        self.assertIsNone(solver.solve(_two_loops()))
+
+    def test_deadline(self) -> None:
+        s = solver.Solver(game.Board(6, 6))
+        with self.assertRaises(solver.SearchLimit):
+            next(s.solutions(deadline=0))
+
+
+class CountSolutionsTest(unittest.TestCase):
+    def test_unique(self) -> None:
+        puzzle = generator.generate(6, 6, generator.DIFFICULTY_RULES, rng=random.Random(1))
+        res = solver.count_solutions(puzzle)
+        self.assertTrue(res.unique)
+        self.assertEqual(res.diff, [])
+
+    def test_not_unique(self) -> None:
+        b = game.Board(2, 2)
+        res = solver.count_solutions(b, 3)
+        self.assertEqual(res.count, 3)
+        self.assertFalse(res.unique)
+        self.assertTrue(res.diff)
+        a, c = res.solutions[0], res.solutions[1]
+        for kind, x, y in res.diff:
+            get = a._get_edge_h if kind == rules.KIND_H else a._get_edge_v
+            other = c._get_edge_h if kind == rules.KIND_H else c._get_edge_v
+            self.assertNotEqual(get(x, y), other(x, y))
+
+    def test_brute_force(self) -> None:
+        # random clues taken from a loop (some of them wrong) on boards small enough to list every loop
+        rng = random.Random(0)
+        for w, h in ((1, 1), (2, 1), (1, 3), (2, 2), (3, 2), (3, 3)):
+            loops = _loops(w, h)
+            for _ in range(30):
+                src = rng.choice(loops)
+                puzzle = game.Board(w, h)
+                for i, n in enumerate(src.counts().cell_lines):
+                    if rng.random() < 0.6:
+                        puzzle.data_num[i] = n if rng.random() < 0.9 else rng.randint(0, 3)
+                expected = sum(
+                    all(n in (game.NUM_UNK, c) for n, c in zip(puzzle.data_num, loop.counts().cell_lines))
+                    for loop in loops
+                )
+                for use_rules in (False, True):
+                    with self.subTest(puzzle=str(puzzle), use_rules=use_rules):
+                        res = solver.count_solutions(puzzle, 100, use_rules=use_rules)
+                        self.assertEqual(res.count, expected)
+
+
+class IsSolvedTest(unittest.TestCase):
+    def test_one_loop(self) -> None:
+        b = game.Board(2, 1)
+        b.data_num[0] = 3
+        for x in (0, 1):
+            b._set_edge_h(x, 0, game.EDGE_1)
+            b._set_edge_h(x, 1, game.EDGE_1)
+        b._set_edge_v(0, 0, game.EDGE_1)
+        b._set_edge_v(1, 0, game.EDGE_0)
+        b._set_edge_v(2, 0, game.EDGE_1)
+        self.assertTrue(solver.is_solved(b))
+        b.data_num[0] = 2
+        self.assertFalse(solver.is_solved(b))
+
+    def test_two_loops(self) -> None:
+        self.assertFalse(solver.is_solved(_two_loops()))
+
+    def test_unknown_edges(self) -> None:
+        self.assertFalse(solver.is_solved(game.Board(2, 2)))
+
+
+if __name__ == '__main__':
+    unittest.main()
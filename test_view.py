@@ -0,0 +1,37 @@
+from __future__ import annotations
+import random
+import unittest
+
+from point import Point
+from view import View
+
+
+class ManyTest(unittest.TestCase):
+    def test_same_as_one_by_one(self) -> None:
+        rng = random.Random(0)
+        xs = [rng.uniform(-50, 50) for _ in range(20)]
+        ys = [rng.uniform(-50, 50) for _ in range(15)]
+        for zoom, pos in ((13.7, Point(-2.3, 0.61)), (0.35, Point(7.25, -11.9)), (64, Point(0.5, 0.5))):
+            view = View(zoom, pos)
+            with self.subTest(zoom=zoom, pos=pos):
+                for fn, many in ((view.map, view.map_many), (view.unmap, view.unmap_many)):
+                    rx, ry = many(xs, ys)
+                    self.assertEqual((len(rx), len(ry)), (len(xs), len(ys)))
+                    # x and y are mapped apart, so every pair of them is a point of the grid
+                    for i, x in enumerate(xs):
+                        for j, y in enumerate(ys):
+                            p = fn(Point(x, y))
+                            self.assertAlmostEqual(rx[i], p.x, places=9)
+                            self.assertAlmostEqual(ry[j], p.y, places=9)
+
+    def test_round_trip(self) -> None:
+        view = View(13.7, Point(-2.3, 0.61))
+        xs = [-3.5, 0, 0.1, 41.25]
+        ys = [2.75, -0.3]
+        rx, ry = view.unmap_many(*view.map_many(xs, ys))
+        for a, b in zip([*rx, *ry], [*xs, *ys]):
+            self.assertAlmostEqual(a, b, places=9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,6 @@
+import array
+import typing as t
+
 import pygame as pg
 
 from point import Point
@@ -29,6 +32,32 @@ class View:
         '''image -> logic'''
         return pos / self.zoom_k + self.pos
 
+    def map_many(
+        self,
+        xs: t.Iterable[float],
+        ys: t.Iterable[float],
+        /,
+    ) -> tuple[array.array[float], array.array[float]]:
+        '''
+        logic -> image for many coordinates at once, without a Point for each;
+        x and y are mapped apart, so the image of (xs[i], ys[j]) is (res_x[i], res_y[j]),
+        which lays out a grid of points as well as a list of them
+        '''
+        px, py = self.pos
+        k = self.zoom_k
+        return array.array('d', [(x - px) * k for x in xs]), array.array('d', [(y - py) * k for y in ys])
+
+    def unmap_many(
+        self,
+        xs: t.Iterable[float],
+        ys: t.Iterable[float],
+        /,
+    ) -> tuple[array.array[float], array.array[float]]:
+        '''image -> logic, as map_many'''
+        px, py = self.pos
+        k = self.zoom_k
+        return array.array('d', [x / k + px for x in xs]), array.array('d', [y / k + py for y in ys])
+
     def zoom(
         self,
         pos: Point,